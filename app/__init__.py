@@ -20,18 +20,50 @@ def create_app():
         app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///site.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Per-request SQL instrumentation
+    app.config['SQL_SLOW_QUERY_MS'] = float(os.environ.get('SQL_SLOW_QUERY_MS', 200))
+    app.config['SQL_LOG_REQUESTS'] = os.environ.get('SQL_LOG_REQUESTS', 'true') == 'true'
+    app.config['SQL_DETECT_N_PLUS_ONE'] = os.environ.get('SQL_DETECT_N_PLUS_ONE') == 'true'
+    app.config['SQL_N_PLUS_ONE_REPEATS'] = int(os.environ.get('SQL_N_PLUS_ONE_REPEATS', 5))
+    
+    # Database engine tuning: pragmas for SQLite, pool settings for server databases
+    app.config['SQLITE_WAL'] = os.environ.get('SQLITE_WAL', 'true') == 'true'
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    # Analytics queries: a replica URL, or a read-only connection to the SQLite file
+    app.config['ANALYTICS_DATABASE_URL'] = os.environ.get('ANALYTICS_DATABASE_URL')
+    app.config['ANALYTICS_READ_ONLY'] = os.environ.get('ANALYTICS_READ_ONLY') == 'true'
+    
+    # Seconds a user's role and profile id are cached in the session (0 disables)
+    app.config['ROLE_CACHE_SECONDS'] = int(os.environ.get('ROLE_CACHE_SECONDS', 0))
+    
+    from app.services.database import configure_database, init_database_events
+    configure_database(app)
     db.init_app(app)
     
+    from app.services.instrumentation import init_sql_instrumentation
+    with app.app_context():
+        init_database_events(app, db.engines)
+        init_sql_instrumentation(app, db.engines.values())
+    
     # Initialize login manager
     login_manager = LoginManager()
     login_manager.login_view = 'auth.login'
     login_manager.init_app(app)
     
+    from sqlalchemy.orm import joinedload
     from app.models.user import User
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Both profiles come with the user in one query, so role checks need no more
+        return db.session.get(User, int(user_id),
+                              options=[joinedload(User.student_profile), joinedload(User.faculty_profile)])
     
     # Custom template filters
     @app.template_filter('average')
@@ -55,8 +87,9 @@ def create_app():
     from app.routes.faculty import faculty as faculty_blueprint
     app.register_blueprint(faculty_blueprint)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    from app.routes.api import api as api_blueprint
+    app.register_blueprint(api_blueprint)
     
+    # Tables are created and upgraded by the migration runner (python -m migrations upgrade),
+    # not on every process start
     return app
@@ -0,0 +1,184 @@
+"""
+Versioned model artifacts
+
+Every trained model is published as its own directory under ``artifacts/``,
+holding the pickled model and scaler, the compact export and a ``manifest.json``
+that records the feature schema, metrics and a checksum of every file. The
+directory is written under a temporary name and renamed into place, then the
+``CURRENT`` file, naming the version being served, is swapped with
+``os.replace``. Readers therefore always see a complete model/scaler pair, and
+rolling back only means pointing ``CURRENT`` at an older directory.
+"""
+import hashlib
+import json
+import os
+import secrets
+import shutil
+from datetime import datetime
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(__file__), 'artifacts')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_FORMAT_VERSION = 1
+
+# Published versions kept on disk; the current one and its parent are never pruned
+KEEP_VERSIONS = 5
+
+
+class ArtifactError(Exception):
+    """A model version is missing, incomplete or doesn't match its manifest"""
+
+
+class ArtifactStore:
+    """Published model versions under ``root`` and the ``CURRENT`` pointer"""
+    
+    def __init__(self, root=None):
+        self.root = root or ARTIFACTS_DIR
+    
+    @property
+    def current_path(self):
+        return os.path.join(self.root, CURRENT_FILE)
+    
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+    
+    def current_version(self):
+        """Version named by ``CURRENT``, or None before the first publish"""
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+    
+    def versions(self):
+        """Published version names, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith('.') and os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE))
+        )
+    
+    def read_manifest(self, version):
+        try:
+            with open(os.path.join(self.version_dir(version), MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ArtifactError(f"Model version {version} has no readable manifest: {e}")
+        if manifest.get('format') != MANIFEST_FORMAT_VERSION:
+            raise ArtifactError(f"Model version {version} has unsupported manifest format {manifest.get('format')}")
+        return manifest
+    
+    def verify(self, version):
+        """Manifest of ``version`` after checking every listed file against its checksum"""
+        manifest = self.read_manifest(version)
+        for name, entry in manifest['files'].items():
+            path = os.path.join(self.version_dir(version), entry['path'])
+            try:
+                digest = _sha256(path)
+            except OSError as e:
+                raise ArtifactError(f"Model version {version} is missing its {name} file: {e}")
+            if digest != entry['sha256']:
+                raise ArtifactError(f"Model version {version} has a corrupted {name} file")
+        return manifest
+    
+    def publish(self, write_files, manifest):
+        """
+        Publish a new version and make it current
+        
+        ``write_files(directory)`` writes the artifacts into a scratch directory and
+        returns ``{name: filename}``; their checksums are added to ``manifest``
+        before the directory is renamed into place. Returns the new version name.
+        """
+        # Microseconds keep names in publish order when two land in the same second
+        version = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{secrets.token_hex(3)}"
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = os.path.join(self.root, f'.tmp-{version}')
+        os.makedirs(tmp_dir)
+        try:
+            files = write_files(tmp_dir)
+            manifest = dict(
+                manifest,
+                format=MANIFEST_FORMAT_VERSION,
+                version=version,
+                created_at=datetime.now().isoformat(timespec='seconds'),
+                parent=self.current_version(),
+                files={
+                    name: {
+                        'path': filename,
+                        'sha256': _sha256(os.path.join(tmp_dir, filename)),
+                        'bytes': os.path.getsize(os.path.join(tmp_dir, filename)),
+                    }
+                    for name, filename in files.items()
+                },
+            )
+            _write_atomic(os.path.join(tmp_dir, MANIFEST_FILE), json.dumps(manifest, indent=2))
+            os.rename(tmp_dir, self.version_dir(version))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        
+        self.activate(version)
+        self.prune()
+        return version
+    
+    def activate(self, version):
+        """Point ``CURRENT`` at ``version`` after verifying it"""
+        self.verify(version)
+        _write_atomic(self.current_path, version + '\n')
+    
+    def rollback(self, version=None):
+        """
+        Make ``version``, or the version the current one replaced, current again
+        
+        Falls back to the newest older version when the parent was pruned or the
+        current manifest can't be read. Returns the version now current.
+        """
+        if version is None:
+            current = self.current_version()
+            if current is None:
+                raise ArtifactError("No model version has been published yet")
+            versions = self.versions()
+            try:
+                version = self.read_manifest(current).get('parent')
+            except ArtifactError:
+                version = None
+            if version not in versions:
+                older = [name for name in versions if name < current]
+                if not older:
+                    raise ArtifactError(f"No version older than {current} to roll back to")
+                version = older[-1]
+        
+        self.activate(version)
+        return version
+    
+    def prune(self, keep=KEEP_VERSIONS):
+        """Delete the oldest versions beyond ``keep``"""
+        current = self.current_version()
+        protected = {current}
+        if current is not None:
+            try:
+                protected.add(self.read_manifest(current).get('parent'))
+            except ArtifactError:
+                pass
+        for version in self.versions()[:-keep]:
+            if version not in protected:
+                shutil.rmtree(self.version_dir(version), ignore_errors=True)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    # A unique scratch name, so concurrent writers never share a half-written file
+    tmp_path = f'{path}.{secrets.token_hex(4)}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
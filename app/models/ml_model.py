@@ -3,38 +3,81 @@ with warnings.catch_warnings():
     warnings.filterwarnings("ignore", category=UserWarning)
     warnings.filterwarnings("ignore", category=FutureWarning)
     import numpy as np
-    import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
-import joblib
 import os
+import hashlib
+import io
+import struct
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from app.models.artifact_store import ArtifactError, ArtifactStore
+
+# File names inside a published artifact version
+ARTIFACT_FILES = {'model': 'model.pkl', 'scaler': 'scaler.pkl', 'forest': 'forest.npz'}
 
 class StudentPerformancePredictor:
-    def __init__(self):
+    def __init__(self, model_path=None, scaler_path=None, forest_path=None, store=None):
+        # scikit-learn, joblib and pandas are imported on first use, so processes
+        # that never predict (login, health checks, CLI tools) don't pay for them,
+        # and a model loaded from the compact export doesn't need them at all
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.is_scaler_fitted = False
-        self.model_path = os.path.join(os.path.dirname(__file__), 'performance_model.pkl')
-        self.scaler_path = os.path.join(os.path.dirname(__file__), 'performance_scaler.pkl')
+        self.model_path = model_path or self.default_model_path()
+        self.scaler_path = scaler_path or self.default_scaler_path()
+        self.forest_path = forest_path or self.default_forest_path()
+        
+        # By default models are loaded from and published to the versioned artifact
+        # store; explicit paths read and write those files directly instead
+        if store is None and not (model_path or scaler_path or forest_path):
+            store = ArtifactStore()
+        self.store = store
+        self.version = None
+        self.manifest = None
+        self.load_error = None
+        # Set by the model registry when single-row predictions are cached
+        self.cache = None
+        # (compact model, scaler, estimator) of the pickled forest used for large batches
+        self._large_batch_model = None
         
         # Try to load existing model if available
         self.load_model()
     
+    @staticmethod
+    def default_model_path():
+        return os.path.join(os.path.dirname(__file__), 'performance_model.pkl')
+    
+    @staticmethod
+    def default_scaler_path():
+        return os.path.join(os.path.dirname(__file__), 'performance_scaler.pkl')
+    
+    @staticmethod
+    def default_forest_path():
+        return os.path.join(os.path.dirname(__file__), 'performance_forest.npz')
+    
     def load_model(self):
-        """Load model from disk if available"""
+        """Load model from disk if available, preferring an up-to-date compact export"""
+        if self.store is not None:
+            version = self.store.current_version()
+            if version is not None:
+                return self._load_version(version)
+        
+        # Model files from before versioned artifacts (or explicit paths)
+        if self._compact_is_current():
+            try:
+                self.scaler, self.model = load_compact_model(self.forest_path)
+                self.is_scaler_fitted = True
+                print("✅ ML Model loaded successfully (compact)")
+                return True
+            except Exception as e:
+                print(f"⚠️ Error loading compact model: {e}")
+        
         try:
             if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-                # Try to load model and catch version warnings
-                import warnings
-                with warnings.catch_warnings():
-                    warnings.filterwarnings("ignore", category=UserWarning)
-                    warnings.filterwarnings("ignore", category=FutureWarning)
-                    self.model = joblib.load(self.model_path)
-                    self.scaler = joblib.load(self.scaler_path)
-                    self.is_scaler_fitted = True
-                    
+                self.model, self.scaler = _load_pickles(self.model_path, self.scaler_path)
+                self.is_scaler_fitted = True
+                
                 # Check if model loaded successfully
                 if self.model is not None:
                     print("✅ ML Model loaded successfully")
@@ -47,193 +90,671 @@ class StudentPerformancePredictor:
             print("🔄 Will retrain model with current scikit-learn version")
         return False
     
-    def save_model(self):
-        """Save model to disk"""
-        if self.model is not None:
+    def _load_version(self, version):
+        """Load a published version; failures are recorded in ``load_error`` for the caller to raise"""
+        try:
+            manifest = self.store.verify(version)
+            directory = self.store.version_dir(version)
+            paths = {name: os.path.join(directory, filename) for name, filename in ARTIFACT_FILES.items()}
+            if 'forest' in manifest['files']:
+                scaler, model = load_compact_model(paths['forest'])
+            else:
+                model, scaler = _load_pickles(paths['model'], paths['scaler'])
+        except Exception as e:
+            self.load_error = f"Could not load model version {version}: {e}"
+            print(f"❌ {self.load_error}")
+            return False
+        
+        self.model, self.scaler = model, scaler
+        self.is_scaler_fitted = True
+        self.model_path, self.scaler_path, self.forest_path = paths['model'], paths['scaler'], paths['forest']
+        self.version, self.manifest = version, manifest
+        self.load_error = None
+        print(f"✅ ML Model {version} loaded successfully")
+        return True
+    
+    def save_model(self, metrics=None):
+        """
+        Save model to disk, along with its compact export
+        
+        With the artifact store the files are published together as a new version,
+        with ``metrics`` and the feature schema in its manifest, and made current.
+        """
+        if self.model is None:
+            return
+        if self.store is None:
+            import joblib
             joblib.dump(self.model, self.model_path)
             joblib.dump(self.scaler, self.scaler_path)
+            self.export_compact()
+            return
+        
+        version = self.store.publish(self._write_artifacts, self._manifest(metrics))
+        directory = self.store.version_dir(version)
+        self.model_path, self.scaler_path, self.forest_path = (
+            os.path.join(directory, ARTIFACT_FILES[name]) for name in ('model', 'scaler', 'forest')
+        )
+        self.version, self.manifest = version, self.store.read_manifest(version)
+        print(f"📦 Published model version {version}")
+    
+    def _write_artifacts(self, directory):
+        import joblib
+        files = {name: ARTIFACT_FILES[name] for name in ('model', 'scaler')}
+        joblib.dump(self.model, os.path.join(directory, files['model']))
+        joblib.dump(self.scaler, os.path.join(directory, files['scaler']))
+        try:
+            export_compact_model(self.model, self.scaler, os.path.join(directory, ARTIFACT_FILES['forest']))
+            files['forest'] = ARTIFACT_FILES['forest']
+        except Exception as e:
+            print(f"⚠️ Could not export compact model: {e}")
+        return files
     
-    def train(self, X, y):
+    def _manifest(self, metrics):
+        """Feature schema, estimator and metrics recorded with a published version"""
+        import sklearn
+        n_features = self.model.n_features_in_
+        if n_features == len(FEATURE_COLUMNS):
+            feature_columns = FEATURE_COLUMNS
+        else:
+            feature_columns = [FEATURE_COLUMNS[i] for i in LEGACY_FEATURE_INDEX]
+        return {
+            'feature_columns': feature_columns,
+            'estimator': type(self.model).__name__,
+            'params': {name: value for name, value in self.model.get_params().items()
+                       if value is None or isinstance(value, (bool, int, float, str))},
+            'metrics': metrics,
+            'sklearn_version': sklearn.__version__,
+        }
+    
+    def export_compact(self):
+        """Write the fitted scaler and forest to ``forest_path``; returns False if they can't be exported"""
+        try:
+            export_compact_model(self.model, self.scaler, self.forest_path)
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not export compact model: {e}")
+            return False
+    
+    def _compact_is_current(self):
+        """Whether the compact export exists and is not older than the pickled model"""
+        try:
+            forest_mtime = os.stat(self.forest_path).st_mtime_ns
+        except OSError:
+            return False
+        try:
+            return forest_mtime >= os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            return True
+    
+    def train(self, X, y, sample_weight=None, estimator=None):
         """
         Train the model on student performance data
         
         Parameters:
         X : DataFrame with features (previous_grade, current_grade, attendance_percentage, study_hours)
         y : Series with target (actual_score)
+        sample_weight : optional per-row weights, used for fitting and for the test metrics
+        estimator : unfitted scikit-learn regressor to train instead of the default forest
         """
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import StandardScaler
+        
         # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test, w_train, w_test = _split(X, y, sample_weight)
         
         # Scale features
+        self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         self.is_scaler_fitted = True
         
         # Train model
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.model.fit(X_train_scaled, y_train)
+        self.model = estimator if estimator is not None else RandomForestRegressor(n_estimators=100, random_state=42)
+        self.model.fit(X_train_scaled, y_train, sample_weight=w_train)
         
         # Evaluate model
-        y_pred = self.model.predict(X_test_scaled)
-        mse = mean_squared_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
+        metrics = _evaluate(self.model, X_test_scaled, y_test, w_test)
         
         # Save model
-        self.save_model()
+        self.save_model(metrics)
         
-        return {
-            'mse': mse,
-            'r2': r2,
-            'test_size': len(y_test)
-        }
+        return metrics
+    
+    def grow(self, X, y, n_trees, sample_weight=None):
+        """
+        Add ``n_trees`` trees fitted on new data to the trained forest, keeping the existing ones
+        
+        The fitted scaler is reused as is, so the old trees keep seeing features on
+        the scale they were trained with. The compact export can't be extended, so
+        the pickled forest is loaded from ``model_path`` when the predictor serves
+        the compact model. ``X`` must have the columns the forest was trained on.
+        """
+        model, scaler = self.model, self.scaler
+        if not hasattr(model, 'warm_start'):
+            model, scaler = _load_pickles(self.model_path, self.scaler_path)
+        if model.n_features_in_ != np.shape(X)[1]:
+            raise ValueError(f'The trained forest expects {model.n_features_in_} features, got {np.shape(X)[1]}.')
+        
+        X_train, X_test, y_train, y_test, w_train, w_test = _split(X, y, sample_weight)
+        X_test_scaled = scaler.transform(X_test)
+        
+        # warm_start keeps the fitted trees and only fits the additional ones
+        model.warm_start = True
+        model.n_estimators = len(model.estimators_) + n_trees
+        model.fit(scaler.transform(X_train), y_train, sample_weight=w_train)
+        model.warm_start = False
+        
+        self.model, self.scaler = model, scaler
+        self.is_scaler_fitted = True
+        metrics = dict(_evaluate(model, X_test_scaled, y_test, w_test), n_estimators=model.n_estimators)
+        self.save_model(metrics)
+        
+        return metrics
     
     def predict(self, features):
         """
         Predict student performance based on features
         
         Parameters:
-        features : DataFrame with columns [previous_grade, current_grade, attendance_percentage, study_hours]
+        features : array-like with columns [previous_grade, current_grade, attendance_percentage, study_hours]
         
         Returns:
         predicted_score : float
         """
+        X = as_feature_matrix(features)
+        cache = self.cache
+        if cache is None or len(X) != 1:
+            return float(self.predict_batch(X)[0])
+        
+        # Score the rounded row, so a cached score is exactly what its key would produce
+        X = np.round(X, cache.decimals)
+        key = (self.version, *X[0].tolist())
+        predicted_score = cache.get(key)
+        if predicted_score is None:
+            predicted_score = float(self.predict_batch(X)[0])
+            cache.put(key, predicted_score)
+        return predicted_score
+    
+    def predict_batch(self, X):
+        """
+        Predict scores for many students at once
+        
+        Parameters:
+        X : array-like of shape (n_rows, 4) with columns
+            [previous_grade, current_grade, attendance_percentage, study_hours],
+            or (n_rows, 3) without current_grade
+        
+        Returns:
+        predicted_scores : ndarray of shape (n_rows,)
+        """
+        X = as_feature_matrix(X)
+        
         if self.model is None or not self.is_scaler_fitted:
             # If no model is trained or scaler not fitted, use a simple heuristic
-            return self._heuristic_prediction(features)
+            return self._heuristic_predictions(X)
         
         try:
-            # Check if the model was trained with or without current_grade
-            # If model expects 3 features but we have 4, use only the required ones
-            if hasattr(self.model, 'n_features_in_') and self.model.n_features_in_ == 3 and features.shape[1] == 4:
-                # Extract only previous_grade, attendance, study_hours
-                features_to_use = np.array([[features[0, 0], features[0, 2], features[0, 3]]])
-                # Scale features
-                features_scaled = self.scaler.transform(features_to_use)
-            else:
-                # Scale features as is
-                features_scaled = self.scaler.transform(features)
-            
-            # Make prediction
-            return self.model.predict(features_scaled)[0]
+            # One scaler transform and one forest call for the whole batch
+            scaler, model = self._batch_model(len(X))
+            features_scaled = scaler.transform(self._model_features(X))
+            return model.predict(features_scaled)
             
         except Exception as e:
             # If there's any error with model prediction, fall back to heuristic
             print(f"Error in model prediction: {e}. Using heuristic instead.")
-            return self._heuristic_prediction(features)
+            return self._heuristic_predictions(X)
+    
+    def _batch_model(self, n_rows):
+        """
+        ``(scaler, model)`` to score a batch of ``n_rows`` rows with
+        
+        Batches of ``COMPACT_MAX_BATCH_ROWS`` or more behind a compact export are
+        scored by the pickled scikit-learn forest, loaded on the first such batch, so
+        processes that only score small batches keep sharing the memory-mapped arrays.
+        Both give the same predictions; if the pickles can't be loaded the compact
+        model scores every batch.
+        """
+        if n_rows < COMPACT_MAX_BATCH_ROWS or not isinstance(self.model, CompactForest):
+            return self.scaler, self.model
+        
+        large_batch_model = self._large_batch_model
+        if large_batch_model is None or large_batch_model[0] is not self.model:
+            try:
+                estimator, scaler = _load_pickles(self.model_path, self.scaler_path)
+            except Exception as e:
+                print(f"⚠️ Could not load the pickled model for large batches: {e}")
+                estimator, scaler = None, None
+            large_batch_model = self._large_batch_model = (self.model, scaler, estimator)
+        
+        if large_batch_model[2] is None:
+            return self.scaler, self.model
+        return large_batch_model[1], large_batch_model[2]
+    
+    def _model_features(self, X):
+        """Select the columns the fitted model expects"""
+        # Models trained without current_grade expect only previous_grade, attendance, study_hours
+        if getattr(self.model, 'n_features_in_', None) == 3 and X.shape[1] == 4:
+            return X[:, LEGACY_FEATURE_INDEX]
+        return X
     
     def _heuristic_prediction(self, features):
         """Simple heuristic for prediction when no model is available"""
-        # Extract features
-        previous_grade = features[0, 0]
-        current_grade = features[0, 1] if features.shape[1] > 3 else previous_grade  # Use previous grade if current not provided
-        attendance = features[0, 2] if features.shape[1] > 3 else features[0, 1]
-        study_hours = features[0, 3] if features.shape[1] > 3 else features[0, 2]
-        
-        # Base prediction on mean of input values with emphasis on current grade
-        # For good current grades (>= 80), ensure prediction tends toward 80+
-        if current_grade >= 80:
-            # For high current grades, prediction should be at least 80
-            # and influenced by other factors
-            base_score = 80
-            # Other factors can push it higher but with diminishing returns
-            additional_score = min(15, (current_grade - 80) * 0.5)
-            
-            # Attendance and study hours can add up to 5 points
-            attendance_bonus = min(3, (attendance - 80) * 0.15) if attendance > 80 else 0
-            study_bonus = min(2, study_hours * 0.1)
-            
-            predicted_score = base_score + additional_score + attendance_bonus + study_bonus
+        return float(self._heuristic_predictions(as_feature_matrix(features))[0])
+    
+    def _heuristic_predictions(self, X):
+        """Vectorized heuristic, identical to the per-row rules for every row"""
+        if X.shape[1] > 3:
+            previous_grade, current_grade, attendance, study_hours = X[:, 0], X[:, 1], X[:, 2], X[:, 3]
+            weights = (0.2, 0.5, 0.2, 0.1)
         else:
-            # For lower current grades, use weighted mean with current grade having highest weight
-            weights = [0.2, 0.5, 0.2, 0.1] if features.shape[1] > 3 else [0.6, 0.3, 0.1]
-            
-            # Normalize attendance (0-100) to 0-100 scale
-            attendance_normalized = attendance
-            
-            # Normalize study hours (assuming max of 40 hours/week) to 0-100 scale
-            study_hours_normalized = min(study_hours * 2.5, 100)
-            
-            # Calculate weighted score
-            if features.shape[1] > 3:
-                predicted_score = (
-                    weights[0] * previous_grade + 
-                    weights[1] * current_grade +
-                    weights[2] * attendance_normalized + 
-                    weights[3] * study_hours_normalized
-                )
-            else:
-                predicted_score = (
-                    weights[0] * previous_grade + 
-                    weights[1] * attendance_normalized + 
-                    weights[2] * study_hours_normalized
-                )
+            # Use previous grade if current not provided
+            previous_grade, attendance, study_hours = X[:, 0], X[:, 1], X[:, 2]
+            current_grade = previous_grade
+            weights = (0.6, 0.0, 0.3, 0.1)
+        
+        predicted_scores = heuristic_scores(previous_grade, current_grade, attendance, study_hours, weights)
         
         # Ensure the score is within reasonable bounds (0-100)
-        return max(0, min(100, predicted_score))
+        return np.clip(predicted_scores, 0, 100)
+
+
+def _load_pickles(model_path, scaler_path):
+    """Unpickle a model and its scaler, silencing scikit-learn version warnings"""
+    import warnings
+    import joblib
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        warnings.filterwarnings("ignore", category=FutureWarning)
+        return joblib.load(model_path), joblib.load(scaler_path)
+
+
+def _split(X, y, sample_weight):
+    """Hold out 20% of the rows for evaluation, splitting the weights alongside"""
+    from sklearn.model_selection import train_test_split
+    if sample_weight is None:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        return X_train, X_test, y_train, y_test, None, None
+    return train_test_split(X, y, sample_weight, test_size=0.2, random_state=42)
+
+
+def _evaluate(model, X_test_scaled, y_test, sample_weight=None):
+    """Test-set metrics of a fitted model"""
+    from sklearn.metrics import mean_squared_error, r2_score
+    y_pred = model.predict(X_test_scaled)
+    return {
+        'mse': mean_squared_error(y_test, y_pred, sample_weight=sample_weight),
+        'r2': r2_score(y_test, y_pred, sample_weight=sample_weight),
+        'test_size': len(y_test)
+    }
+
+
+# Column order expected by the predictor
+FEATURE_COLUMNS = ['previous_grade', 'current_grade', 'attendance_percentage', 'study_hours']
+
+# Columns of the 4-feature layout used by legacy models trained without current_grade
+LEGACY_FEATURE_INDEX = [0, 2, 3]
+
+
+def as_feature_matrix(X):
+    """Coerce a single row or a batch of rows into a 2-D float array"""
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    return X
+
+
+def heuristic_scores(previous_grade, current_grade, attendance, study_hours, weights=(0.2, 0.5, 0.2, 0.1)):
+    """
+    Rule-based score for arrays of students (unclipped)
+    
+    Good current grades (>= 80) start at 80 and earn diminishing bonuses; lower
+    current grades use a weighted mean with ``weights`` applied to
+    (previous_grade, current_grade, attendance, normalized study hours).
+    """
+    # For high current grades, prediction should be at least 80 and influenced by other factors
+    additional_score = np.minimum(15, (current_grade - 80) * 0.5)
+    # Attendance and study hours can add up to 5 points
+    attendance_bonus = np.where(attendance > 80, np.minimum(3, (attendance - 80) * 0.15), 0)
+    study_bonus = np.minimum(2, study_hours * 0.1)
+    high_scores = 80 + additional_score + attendance_bonus + study_bonus
+    
+    # Normalize study hours (assuming max of 40 hours/week) to 0-100 scale
+    study_hours_normalized = np.minimum(study_hours * 2.5, 100)
+    weighted_scores = (
+        weights[0] * previous_grade +
+        weights[1] * current_grade +
+        weights[2] * attendance +
+        weights[3] * study_hours_normalized
+    )
+    
+    return np.where(current_grade >= 80, high_scores, weighted_scores)
 
 
 # Function to generate synthetic data for initial model training
-def generate_synthetic_data(n_samples=100):
-    np.random.seed(42)
+def generate_synthetic_data(n_samples=100, random_state=42, dtype=np.float64, as_frame=True):
+    """
+    Generate synthetic student records
+    
+    Parameters:
+    n_samples : number of rows
+    random_state : int seed, ``np.random.Generator`` or ``np.random.RandomState``.
+        An int seeds a private ``RandomState`` so the default reproduces the
+        historical training data without touching the global NumPy seed.
+    dtype : dtype of the generated columns (e.g. ``np.float32`` to halve memory)
+    as_frame : return a DataFrame; if False return ``(X, y)`` arrays with X
+        columns in ``FEATURE_COLUMNS`` order
+    """
+    rng = _as_random_state(random_state)
+    X, y = _synthetic_block(rng, n_samples, dtype)
+    if not as_frame:
+        return X, y
     
-    # Generate random features with more realistic distributions
+    # Create DataFrame
+    import pandas as pd
+    data = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    data['actual_score'] = y
+    return data
+
+
+def iter_synthetic_data(n_samples, chunk_size=100_000, random_state=42, dtype=np.float64, as_frame=False):
+    """
+    Stream synthetic records in fixed-size blocks
+    
+    Yields ``(X, y)`` array pairs (or DataFrames when ``as_frame`` is True) of at
+    most ``chunk_size`` rows, drawing from one generator so the blocks together
+    follow the same distribution as ``generate_synthetic_data``.
+    """
+    rng = _as_random_state(random_state)
+    remaining = n_samples
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        X, y = _synthetic_block(rng, size, dtype)
+        if as_frame:
+            import pandas as pd
+            block = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+            block['actual_score'] = y
+            yield block
+        else:
+            yield X, y
+        remaining -= size
+
+
+def _as_random_state(random_state):
+    if isinstance(random_state, (np.random.Generator, np.random.RandomState)):
+        return random_state
+    return np.random.RandomState(random_state)
+
+
+def _synthetic_block(rng, n_samples, dtype):
+    """Draw one block of features and scores, fully vectorized"""
     # Previous grades with normal distribution around 75
-    previous_grades = np.clip(np.random.normal(75, 10, n_samples), 40, 100)
+    previous_grades = np.clip(rng.normal(75, 10, n_samples), 40, 100)
     
     # Current grades with normal distribution around 78
-    current_grades = np.clip(np.random.normal(78, 12, n_samples), 40, 100)
+    current_grades = np.clip(rng.normal(78, 12, n_samples), 40, 100)
     
     # Attendance with skewed distribution toward higher values (most students attend)
-    attendance = np.clip(np.random.beta(7, 2, n_samples) * 100, 50, 100)
+    attendance = np.clip(rng.beta(7, 2, n_samples) * 100, 50, 100)
     
     # Study hours with normal distribution around 15 hours/week
-    study_hours = np.clip(np.random.normal(15, 8, n_samples), 1, 40)
-    
-    # Create a synthetic relationship that centers around 80 for good students
-    actual_scores = np.zeros(n_samples)
-    
-    for i in range(n_samples):
-        if current_grades[i] >= 80:
-            # For high current grades, base score is 80 with bonuses
-            base_score = 80
-            additional_score = min(15, (current_grades[i] - 80) * 0.5)
-            attendance_bonus = min(3, (attendance[i] - 80) * 0.15) if attendance[i] > 80 else 0
-            study_bonus = min(2, study_hours[i] * 0.1)
-            
-            score = base_score + additional_score + attendance_bonus + study_bonus
-        else:
-            # For lower current grades, weighted average
-            score = (
-                0.2 * previous_grades[i] +
-                0.5 * current_grades[i] +
-                0.2 * attendance[i] +
-                0.1 * min(study_hours[i] * 2.5, 100)
-            )
-        
-        # Add some random noise
-        actual_scores[i] = score + np.random.normal(0, 3)
+    study_hours = np.clip(rng.normal(15, 8, n_samples), 1, 40)
+    
+    # Same relationship as the heuristic: centers around 80 for good students,
+    # weighted average otherwise, plus some random noise
+    actual_scores = heuristic_scores(previous_grades, current_grades, attendance, study_hours)
+    actual_scores += rng.normal(0, 3, n_samples)
     
     # Ensure scores are within reasonable bounds
     actual_scores = np.clip(actual_scores, 0, 100)
     
-    # Create DataFrame
-    data = pd.DataFrame({
-        'previous_grade': previous_grades,
-        'current_grade': current_grades,
-        'attendance_percentage': attendance,
-        'study_hours': study_hours,
-        'actual_score': actual_scores
-    })
+    X = np.empty((n_samples, len(FEATURE_COLUMNS)), dtype=dtype)
+    X[:, 0] = previous_grades
+    X[:, 1] = current_grades
+    X[:, 2] = attendance
+    X[:, 3] = study_hours
+    return X, actual_scores.astype(dtype, copy=False)
+
+
+# Layout version of the compact model file
+COMPACT_FORMAT_VERSION = 1
+
+# Array data in the compact file starts on this boundary; NumPy reads misaligned
+# memory-mapped arrays through a much slower path
+COMPACT_ALIGNMENT = 64
+
+# Zip extra-field id of the padding that aligns each member's data
+ALIGNMENT_EXTRA_ID = 0xD935
+
+# Batches smaller than this advance through all trees together, dropping rows as they
+# reach a leaf; larger ones are walked a group of trees at a time, so the arrays of
+# one step stay in cache and each step costs one NumPy call per operation
+COMPACT_GROUPED_MIN_ROWS = 128
+
+# (tree, row) pairs walked together in a group
+COMPACT_GROUP_PAIRS = 8192
+
+# Batches at least this large are scored by the pickled scikit-learn forest instead,
+# which is faster than the compact evaluator from about this size on
+COMPACT_MAX_BATCH_ROWS = 1000
+
+
+class CompactScaler:
+    """``StandardScaler.transform`` from exported mean/scale arrays"""
     
-    return data
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.n_features_in_ = len(mean)
+    
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class CompactForest:
+    """
+    Regression forest flattened into contiguous node arrays, scored with NumPy only
+    
+    All trees share one node numbering: ``roots`` holds each tree's root node and
+    ``children[node]`` its (left, right) children, and leaves point back to
+    themselves with an infinite threshold, so a row can keep stepping once it has
+    reached one. Like scikit-learn, features are
+    compared as float32 against float64 thresholds, so predictions match the
+    original forest.
+    """
+    
+    def __init__(self, feature, threshold, children, value, is_leaf, roots, depths):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children.reshape(-1)
+        self.value = value
+        self.is_leaf = is_leaf
+        self.roots = roots
+        self.depths = depths
+        self.n_estimators = len(roots)
+        self.n_features_in_ = None
+    
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if len(X) >= COMPACT_GROUPED_MIN_ROWS:
+            totals = self._sum_tree_groups(X)
+        else:
+            totals = self._sum_all_trees(X)
+        return totals / self.n_estimators
+    
+    def _sum_all_trees(self, X):
+        n_rows, n_features = X.shape
+        flat_X = X.reshape(-1)
+        rows = np.repeat(np.arange(n_rows), self.n_estimators)
+        offsets = rows * n_features
+        nodes = np.tile(self.roots, n_rows)
+        totals = np.zeros(n_rows)
+        while len(nodes):
+            go_right = flat_X[offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+            # (row, tree) pairs that reached a leaf add its value and drop out
+            done = self.is_leaf[nodes]
+            if done.any():
+                totals += np.bincount(rows[done], weights=self.value[nodes[done]], minlength=n_rows)
+                active = ~done
+                nodes, offsets, rows = nodes[active], offsets[active], rows[active]
+        return totals
+    
+    def _sum_tree_groups(self, X):
+        n_rows = len(X)
+        # Feature-major layout, so one step of one tree reads a single column of X
+        columns = np.ascontiguousarray(X.T).reshape(-1)
+        column_starts = self.feature * n_rows
+        group_size = max(1, COMPACT_GROUP_PAIRS // n_rows)
+        totals = np.zeros(n_rows)
+        for start in range(0, self.n_estimators, group_size):
+            roots = self.roots[start:start + group_size]
+            nodes = np.repeat(roots, n_rows)
+            rows = np.tile(np.arange(n_rows), len(roots))
+            # Rows that reach a leaf early stay on it, since leaves loop back to themselves
+            for _ in range(self.depths[start:start + group_size].max()):
+                nodes = self.children[2 * nodes + (columns[rows + column_starts[nodes]] > self.threshold[nodes])]
+            totals += self.value[nodes].reshape(len(roots), n_rows).sum(axis=0)
+        return totals
+
+
+def export_compact_model(model, scaler, path):
+    """
+    Flatten a fitted ``StandardScaler`` and tree-ensemble regressor into one
+    uncompressed ``.npz`` file, written atomically so processes that have the
+    previous file memory-mapped keep reading it undisturbed
+    """
+    arrays = _compact_arrays(model, scaler)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        _write_aligned_npz(f, arrays)
+    os.replace(tmp_path, path)
+
+
+def _write_aligned_npz(f, arrays):
+    """
+    ``np.savez`` with every array's data aligned to ``COMPACT_ALIGNMENT`` in the file
+    
+    A ``.npy`` header already pads the data to a multiple of 64 bytes, so each zip
+    member's local header is padded with an extra field to end on that boundary too.
+    """
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED) as archive:
+        for name, array in arrays.items():
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, np.asarray(array), allow_pickle=False)
+            info = zipfile.ZipInfo(f'{name}.npy', date_time=(1980, 1, 1, 0, 0, 0))
+            # Local header: 30 fixed bytes, the name, then the 4-byte extra-field header and its padding
+            header_end = f.tell() + 30 + len(info.filename.encode()) + 4
+            padding = -header_end % COMPACT_ALIGNMENT
+            info.extra = struct.pack('<HH', ALIGNMENT_EXTRA_ID, padding) + bytes(padding)
+            archive.writestr(info, buffer.getvalue())
+
+
+def compact_model(model, scaler):
+    """In-memory ``(scaler, forest)`` pair, as ``load_compact_model`` would return it after an export"""
+    return _from_compact_arrays(_compact_arrays(model, scaler))
+
+
+def _compact_arrays(model, scaler):
+    """Flat arrays of an averaging tree ensemble (random forest, extra trees) and its scaler"""
+    estimators = getattr(model, 'estimators_', None)
+    if (estimators is None or not all(hasattr(estimator, 'tree_') for estimator in estimators)
+            or getattr(scaler, 'mean_', None) is None):
+        raise TypeError(f"{type(model).__name__} is not a fitted forest with a fitted StandardScaler")
+    
+    features, thresholds, children, values, leaves, roots, depths = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count) + offset
+        is_leaf = tree.children_left < 0
+        # Leaves loop back to themselves; a +inf threshold keeps them going "left"
+        left = np.where(is_leaf, node_ids, tree.children_left + offset)
+        right = np.where(is_leaf, node_ids, tree.children_right + offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        children.append(np.column_stack([left, right]))
+        values.append(tree.value[:, 0, 0])
+        leaves.append(is_leaf)
+        roots.append(offset)
+        depths.append(tree.max_depth)
+        offset += tree.node_count
+    
+    return {
+        'meta': np.array([COMPACT_FORMAT_VERSION, model.n_features_in_], dtype=np.int64),
+        'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+        # Node indices are stored as intp so NumPy can index with them without converting
+        'feature': np.concatenate(features).astype(np.intp),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'children': np.concatenate(children).astype(np.intp),
+        'value': np.concatenate(values).astype(np.float64),
+        'is_leaf': np.concatenate(leaves),
+        'roots': np.array(roots, dtype=np.intp),
+        'depths': np.array(depths, dtype=np.intp),
+    }
+
+
+def load_compact_model(path, mmap=True):
+    """
+    ``(scaler, forest)`` from a file written by ``export_compact_model``
+    
+    With ``mmap`` the node arrays are memory-mapped read-only straight from the
+    file, so every process serving the same file shares one copy in the page cache.
+    """
+    return _from_compact_arrays(_memmap_npz(path) if mmap else dict(np.load(path)))
+
+
+def _from_compact_arrays(arrays):
+    format_version, n_features = (int(v) for v in arrays['meta'])
+    if format_version != COMPACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model format {format_version}")
+    
+    scaler = CompactScaler(np.asarray(arrays['scaler_mean']), np.asarray(arrays['scaler_scale']))
+    forest = CompactForest(arrays['feature'], arrays['threshold'], arrays['children'],
+                           arrays['value'], arrays['is_leaf'], arrays['roots'], arrays['depths'])
+    forest.n_features_in_ = n_features
+    return scaler, forest
+
+
+def _memmap_npz(path):
+    """Memory-map every array of an uncompressed ``.npz`` (``np.load`` can't for archives)"""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename} is compressed and can't be memory-mapped")
+            # The member's data follows its local header, whose name and extra fields vary in length
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<26xHH', f.read(30))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            array = np.memmap(
+                path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                order='F' if fortran_order else 'C',
+            )
+            if not array.flags.aligned:
+                # Written before exports were aligned; a private aligned copy scores faster
+                array = np.array(array)
+            arrays[info.filename[:-len('.npy')]] = array
+    return arrays
 
 
 # Initialize and train model with synthetic data if no real data is available
-def initialize_model():
-    predictor = StudentPerformancePredictor()
+def initialize_model(store=None):
+    predictor = StudentPerformancePredictor(store=store)
     
     # If model doesn't exist or scaler not fitted, train with synthetic data
     if predictor.model is None or not predictor.is_scaler_fitted:
+        if predictor.load_error:
+            # Never retrain over a published version that failed to load
+            raise ArtifactError(predictor.load_error)
         print("🔧 Initializing ML model with synthetic data...")
         data = generate_synthetic_data(200)
         X = data[['previous_grade', 'current_grade', 'attendance_percentage', 'study_hours']]
@@ -241,5 +762,192 @@ def initialize_model():
         
         metrics = predictor.train(X, y)
         print(f"✅ Initialized model with synthetic data. Metrics: {metrics}")
+    elif predictor.version is None:
+        # Model files from before versioned artifacts become the first version
+        if isinstance(predictor.model, CompactForest):
+            predictor.model, predictor.scaler = _load_pickles(predictor.model_path, predictor.scaler_path)
+        predictor.save_model()
+    
+    # Serve from the memory-mapped export, so worker processes share the model's pages
+    if not isinstance(predictor.model, CompactForest) and 'forest' in predictor.manifest['files']:
+        predictor.load_model()
     
     return predictor
+
+
+# Single-row predictions cached per process; off unless PREDICTION_CACHE_SIZE is set,
+# since cached rows are scored with their inputs rounded to PREDICTION_CACHE_DECIMALS
+DEFAULT_PREDICTION_CACHE_SIZE = 0
+
+# Decimal places of the performance form inputs, the precision cache keys are rounded to
+PREDICTION_CACHE_DECIMALS = 2
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of single-row predictions
+    
+    Keys are the model version followed by the features rounded to ``decimals``
+    places, so near-identical submissions share an entry and scores of one model
+    version are never served for another.
+    """
+    
+    def __init__(self, max_size, decimals=PREDICTION_CACHE_DECIMALS):
+        self.max_size = max_size
+        self.decimals = decimals
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key):
+        with self._lock:
+            predicted_score = self._entries.get(key)
+            if predicted_score is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return predicted_score
+    
+    def put(self, key, predicted_score):
+        with self._lock:
+            self._entries[key] = predicted_score
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of the trained predictor.
+    
+    The first call to ``get()`` builds the predictor through ``initialize_model()``
+    from ``store``; later calls reuse it until the store's ``CURRENT`` pointer is
+    replaced (a retrain publishes a new version, a rollback restores an old one) or
+    the legacy model files change. The new version is swapped in without a restart;
+    if it fails to load, the error is reported and the predictor already in memory
+    keeps serving until the artifacts change again.
+    Loaded predictors share the registry's ``PredictionCache``, emptied on every load.
+    """
+    
+    def __init__(self, loader=None, store=None):
+        self._loader = loader or (lambda: initialize_model(self.store))
+        self.store = store or ArtifactStore()
+        self._lock = threading.Lock()
+        self._predictor = None
+        self._signature = None
+        self._hits = 0
+        self._loads = 0
+        self._last_load_seconds = None
+        self._loaded_at = None
+        self._load_errors = 0
+        self._last_error = None
+        cache_size = int(os.environ.get('PREDICTION_CACHE_SIZE', DEFAULT_PREDICTION_CACHE_SIZE))
+        self.cache = PredictionCache(cache_size) if cache_size > 0 else None
+    
+    def _artifact_signature(self):
+        """Cheap fingerprint of the artifacts currently on disk"""
+        signature = []
+        try:
+            # os.replace gives CURRENT a new inode on every publish or rollback
+            stat = os.stat(self.store.current_path)
+            signature.append((stat.st_ino, stat.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+        for path in (StudentPerformancePredictor.default_model_path(),
+                     StudentPerformancePredictor.default_scaler_path(),
+                     StudentPerformancePredictor.default_forest_path()):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def get(self):
+        """Return the shared predictor, (re)loading it if the artifacts changed"""
+        signature = self._artifact_signature()
+        predictor = self._predictor
+        if predictor is not None and signature == self._signature:
+            with self._lock:
+                self._hits += 1
+            return predictor
+        
+        with self._lock:
+            # Another thread may have reloaded while we were waiting for the lock
+            if self._predictor is not None and self._artifact_signature() == self._signature:
+                self._hits += 1
+                return self._predictor
+            
+            signature = self._artifact_signature()
+            start = time.perf_counter()
+            try:
+                predictor = self._loader()
+            except Exception as e:
+                if self._predictor is None:
+                    raise
+                # Keep serving the model in memory; retry once the artifacts change again
+                self._signature = signature
+                self._load_errors += 1
+                self._last_error = str(e)
+                print(f"❌ Model reload failed, still serving version {self._predictor.version}: {e}")
+                return self._predictor
+            self._last_load_seconds = time.perf_counter() - start
+            # Loading may have (re)trained and saved the model, so fingerprint afterwards
+            self._signature = self._artifact_signature()
+            if self.cache is not None:
+                # Entries of the previous model would never be hit again
+                self.cache.clear()
+                predictor.cache = self.cache
+            self._predictor = predictor
+            self._loads += 1
+            self._loaded_at = time.time()
+            self._last_error = None
+            print(f"✅ Model registry loaded predictor {predictor.version} in {self._last_load_seconds:.3f}s")
+            return predictor
+    
+    @property
+    def version(self):
+        """Manifest version of the served predictor, stable across processes"""
+        predictor = self._predictor
+        if predictor is not None and predictor.version is not None:
+            return predictor.version
+        # Legacy model files without a manifest
+        return hashlib.sha1(repr(self._artifact_signature()).encode()).hexdigest()[:12]
+    
+    def invalidate(self):
+        """Make the next ``get()`` reload the predictor; the current one serves if that fails"""
+        with self._lock:
+            self._signature = None
+    
+    def stats(self):
+        """Load/hit counters for monitoring"""
+        with self._lock:
+            return {
+                'loaded': self._predictor is not None,
+                'version': self._predictor.version if self._predictor is not None else None,
+                'loads': self._loads,
+                'hits': self._hits,
+                'last_load_seconds': self._last_load_seconds,
+                'loaded_at': self._loaded_at,
+                'load_errors': self._load_errors,
+                'last_error': self._last_error,
+                'prediction_cache': self.cache.stats() if self.cache is not None else None,
+            }
+
+
+model_registry = ModelRegistry()
+
+
+def get_predictor():
+    """Shared predictor for request handlers; loads at most once per artifact version"""
+    return model_registry.get()
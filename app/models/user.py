@@ -1,3 +1,5 @@
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from app import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -10,7 +12,7 @@ class User(db.Model, UserMixin):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
     role = db.Column(db.String(20), nullable=False)  # 'student' or 'faculty'
-    reset_token = db.Column(db.String(100), nullable=True)
+    reset_token = db.Column(db.String(100), nullable=True, index=True)
     reset_token_expiry = db.Column(db.DateTime, nullable=True)
     
     # Relationships
@@ -44,8 +46,12 @@ class User(db.Model, UserMixin):
 
 
 class StudentProfile(db.Model):
+    __table_args__ = (
+        db.Index('ix_student_profile_last_name', 'last_name', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True, index=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     roll_number = db.Column(db.String(20), unique=True, nullable=False)
@@ -60,7 +66,7 @@ class StudentProfile(db.Model):
 
 class FacultyProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True, index=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     department = db.Column(db.String(50), nullable=False)
@@ -70,18 +76,28 @@ class FacultyProfile(db.Model):
 
 
 class Subject(db.Model):
+    __table_args__ = (
+        db.Index('ix_subject_name', 'name', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     code = db.Column(db.String(20), unique=True, nullable=False)
     
-    # Relationships
-    student_subjects = db.relationship('StudentSubject', backref='subject', cascade='all, delete-orphan')
+    # Relationships; an enrollment is rarely used without its subject, so it is joined in
+    student_subjects = db.relationship('StudentSubject', backref=db.backref('subject', lazy='joined'),
+                                       cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Subject {self.name}>'
 
 
 class StudentSubject(db.Model):
+    __table_args__ = (
+        db.Index('ix_student_subject_student_subject', 'student_id', 'subject_id', unique=True),
+        db.Index('ix_student_subject_subject_id', 'subject_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
@@ -91,6 +107,10 @@ class StudentSubject(db.Model):
 
 
 class StudentPerformance(db.Model):
+    __table_args__ = (
+        db.Index('ix_student_performance_student_subject', 'student_id', 'subject_id', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student_profile.id'), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
@@ -99,9 +119,94 @@ class StudentPerformance(db.Model):
     attendance_percentage = db.Column(db.Float, nullable=False)  # Attendance percentage
     study_hours = db.Column(db.Float, nullable=False)  # Weekly study hours
     predicted_score = db.Column(db.Float, nullable=True)  # ML predicted score
+    actual_score = db.Column(db.Float, nullable=True)  # Observed final score, the training label
     
-    # Relationship
-    subject = db.relationship('Subject')
+    # Relationship; joined in, as every page listing performance records shows the subject name
+    subject = db.relationship('Subject', lazy='joined')
     
     def __repr__(self):
         return f'<StudentPerformance {self.id}>'
+
+
+class DataRevision(db.Model):
+    """
+    Revision counters bumped whenever the data behind a view changes
+    
+    Scopes are ``'performance'`` (any performance row), ``'student:<id>'`` (one
+    student's rows) and ``'predictions'`` (stored scores recomputed by a new model).
+    """
+    scope = db.Column(db.String(40), primary_key=True)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+    
+    @staticmethod
+    def student_scope(student_id):
+        return f'student:{student_id}'
+    
+    @classmethod
+    def current(cls, *scopes):
+        """Revisions of the given scopes, 0 for scopes never bumped"""
+        revisions = dict(db.session.query(cls.scope, cls.revision).filter(cls.scope.in_(scopes)))
+        return tuple(revisions.get(scope, 0) for scope in scopes)
+    
+    @classmethod
+    def bump(cls, *scopes):
+        """
+        Increment the given scopes as part of the current transaction
+        
+        A single upsert per scope, so concurrent first bumps of a new scope (a new
+        student's) can't both insert it; scopes are written in sorted order so
+        concurrent bumps take their row locks in the same order.
+        """
+        table = cls.__table__
+        rows = [{'scope': scope, 'revision': 1} for scope in sorted(set(scopes))]
+        dialect = db.session.connection().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            statement = insert(table).on_conflict_do_update(index_elements=[table.c.scope],
+                                                            set_={'revision': table.c.revision + 1})
+        elif dialect == 'mysql':
+            statement = mysql.insert(table).on_duplicate_key_update(revision=table.c.revision + 1)
+        else:
+            cls._bump_without_upsert([row['scope'] for row in rows])
+            return
+        db.session.execute(statement, rows)
+    
+    @classmethod
+    def _bump_without_upsert(cls, scopes):
+        table = cls.__table__
+        db.session.execute(
+            table.update().where(table.c.scope.in_(scopes)).values(revision=table.c.revision + 1)
+        )
+        existing = {scope for (scope,) in db.session.query(cls.scope).filter(cls.scope.in_(scopes))}
+        for scope in sorted(set(scopes) - existing):
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert().values(scope=scope, revision=1))
+            except IntegrityError:
+                # Inserted by a concurrent transaction since the select; count on its row
+                db.session.execute(
+                    table.update().where(table.c.scope == scope).values(revision=table.c.revision + 1)
+                )
+    
+    def __repr__(self):
+        return f'<DataRevision {self.scope}={self.revision}>'
+
+
+class DashboardSummary(db.Model):
+    """Single-row running totals behind the faculty dashboard (see app.services.summary)"""
+    id = db.Column(db.Integer, primary_key=True)
+    subject_count = db.Column(db.Integer, nullable=False, default=0)
+    student_count = db.Column(db.Integer, nullable=False, default=0)
+    performance_count = db.Column(db.Integer, nullable=False, default=0)
+    predicted_score_sum = db.Column(db.Float, nullable=False, default=0.0)
+    predicted_score_count = db.Column(db.Integer, nullable=False, default=0)
+    students_with_data = db.Column(db.Integer, nullable=False, default=0)
+    
+    @property
+    def avg_predicted_score(self):
+        if not self.predicted_score_count:
+            return 0
+        return self.predicted_score_sum / self.predicted_score_count
+    
+    def __repr__(self):
+        return f'<DashboardSummary {self.id}>'
@@ -0,0 +1,137 @@
+import gzip
+import json
+from flask import Blueprint, request, abort, make_response, jsonify
+from flask_login import login_required
+from app import db
+from app.models.user import StudentProfile, Subject, StudentPerformance, DataRevision
+from app.models.ml_model import get_predictor, model_registry
+from app.services.access import current_identity, role_required
+from app.services.what_if import what_if_grid
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Bump when the payload layout changes
+PAYLOAD_VERSION = 1
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+@api.route('/students/<int:student_id>/performance')
+@role_required('student', 'faculty', profile=False, abort_code=403)
+def student_performance(student_id):
+    """Performance series of one student, one array per field"""
+    role, profile_id = current_identity()
+    if role == 'student' and profile_id != student_id:
+        abort(403)
+    
+    revision = '.'.join(map(str, DataRevision.current(DataRevision.student_scope(student_id), 'predictions')))
+    etag = f'student-{student_id}-v{PAYLOAD_VERSION}-{revision}'
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+    
+    rows = (db.session.query(Subject.id, Subject.name, StudentPerformance.previous_grade,
+                             StudentPerformance.current_grade, StudentPerformance.attendance_percentage,
+                             StudentPerformance.study_hours, StudentPerformance.predicted_score)
+            .outerjoin(Subject, Subject.id == StudentPerformance.subject_id)
+            .filter(StudentPerformance.student_id == student_id)
+            .order_by(StudentPerformance.id)
+            .all())
+    columns = ['subject_id', 'subject', 'previous_grade', 'current_grade',
+               'attendance_percentage', 'study_hours', 'predicted_score']
+    
+    return _json_response({
+        'version': PAYLOAD_VERSION,
+        'revision': revision,
+        'student_id': student_id,
+        'count': len(rows),
+        'columns': _columnar(columns, rows),
+    }, etag)
+
+
+@api.route('/subjects/<int:subject_id>/performance')
+@role_required('faculty', profile=False, abort_code=403)
+def subject_performance(subject_id):
+    """Performance series of every student in one subject, one array per field"""
+    revision = '.'.join(map(str, DataRevision.current('performance', 'predictions')))
+    etag = f'subject-{subject_id}-v{PAYLOAD_VERSION}-{revision}'
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+    
+    subject = Subject.query.get_or_404(subject_id)
+    rows = (db.session.query(StudentProfile.id, StudentProfile.roll_number, StudentPerformance.previous_grade,
+                             StudentPerformance.current_grade, StudentPerformance.attendance_percentage,
+                             StudentPerformance.study_hours, StudentPerformance.predicted_score)
+            .join(StudentProfile, StudentProfile.id == StudentPerformance.student_id)
+            .filter(StudentPerformance.subject_id == subject_id)
+            .order_by(StudentPerformance.student_id)
+            .all())
+    columns = ['student_id', 'roll_number', 'previous_grade', 'current_grade',
+               'attendance_percentage', 'study_hours', 'predicted_score']
+    
+    return _json_response({
+        'version': PAYLOAD_VERSION,
+        'revision': revision,
+        'subject_id': subject.id,
+        'subject': subject.name,
+        'count': len(rows),
+        'columns': _columnar(columns, rows),
+    }, etag)
+
+
+@api.route('/what-if', methods=['POST'])
+@login_required
+def what_if():
+    """
+    Predicted scores over a grid of attendance and study hours around a base record
+    
+    Read-only: the grid is scored in one batch and nothing is stored. Expects
+    ``{"base": {<feature>: value, ...}, "sweeps": {"attendance_percentage":
+    {"start", "stop", "step"}, "study_hours": {...}}}``.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error='Expected a JSON object.'), 400
+    
+    try:
+        surface = what_if_grid(payload.get('base'), payload.get('sweeps') or {}, get_predictor())
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    
+    return _json_response({
+        'version': PAYLOAD_VERSION,
+        'model_version': model_registry.version,
+        **surface,
+    })
+
+
+def _columnar(names, rows):
+    """Transpose result rows into {field: [values...]}"""
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+
+def _json_response(payload, etag=None):
+    """Compact JSON, gzip-compressed when the client accepts it, with revalidation headers if ``etag`` is given"""
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    response = make_response(body)
+    response.mimetype = 'application/json'
+    if len(body) >= GZIP_MIN_BYTES and 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if etag is None:
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    return _cache_headers(response, etag)
+
+
+def _not_modified(etag):
+    return _cache_headers(make_response('', 304), etag)
+
+
+def _cache_headers(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
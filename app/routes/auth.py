@@ -1,8 +1,10 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, session
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
 from app.models.user import User, StudentProfile, FacultyProfile
+from app.services.access import IDENTITY_SESSION_KEY
+from app.services.summary import update_summary
 
 auth = Blueprint('auth', __name__)
 
@@ -97,6 +99,7 @@ def register_student(user_id):
         )
         
         db.session.add(student_profile)
+        update_summary(student_count=1)
         db.session.commit()
         
         flash('Registration successful! Please login.')
@@ -133,6 +136,7 @@ def register_faculty(user_id):
 @login_required
 def logout():
     logout_user()
+    session.pop(IDENTITY_SESSION_KEY, None)
     return redirect(url_for('auth.index'))
 
 @auth.route('/forgot-password', methods=['GET', 'POST'])
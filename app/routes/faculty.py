@@ -1,63 +1,48 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
-from flask_login import login_required, current_user
-import pandas as pd
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import io
-import base64
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, abort, make_response
+from flask_login import current_user
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
 from app import db
-from app.models.user import User, StudentProfile, FacultyProfile, Subject, StudentPerformance, StudentSubject
+from app.models.user import User, StudentProfile, FacultyProfile, Subject, StudentPerformance, StudentSubject, DataRevision
+from app.services.access import current_profile, role_required
+from app.services.analytics import performance_analytics
+from app.services.charts import ANALYTICS_CHARTS, chart_cache, render_analytics_chart
+from app.services.pagination import keyset_paginate, per_page_arg, prefix_filter
+from app.services.summary import get_dashboard_summary, update_summary
+from app.services.performance_import import REQUIRED_COLUMNS, import_performance_csv, open_text_stream
 
 faculty = Blueprint('faculty', __name__)
 
+# Listing sort options; the last column makes every sort key unique
+STUDENT_SORTS = {
+    'last_name': (StudentProfile.last_name, StudentProfile.id),
+    'roll_number': (StudentProfile.roll_number, StudentProfile.id),
+}
+
+SUBJECT_SORTS = {
+    'code': (Subject.code, Subject.id),
+    'name': (Subject.name, Subject.id),
+}
+
 @faculty.route('/dashboard')
-@login_required
+@role_required('faculty')
 def dashboard():
-    if current_user.role != 'faculty':
-        flash('Access denied. You are not a faculty member.')
-        return redirect(url_for('auth.index'))
-    
-    # Get faculty profile
-    profile = FacultyProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('faculty.profile'))
-    
-    # Get all subjects
-    subjects = Subject.query.all()
-    
-    # Get all students
-    students = StudentProfile.query.all()
-    
-    # Get overall performance stats
-    performance_data = StudentPerformance.query.all()
-    
-    # Count of students with performance data
-    students_with_data = db.session.query(StudentPerformance.student_id).distinct().count()
+    profile = current_profile()
     
-    # Average predicted score across all students and subjects
-    avg_predicted_score = 0
-    if performance_data:
-        valid_scores = [p.predicted_score for p in performance_data if p.predicted_score is not None]
-        avg_predicted_score = sum(valid_scores) / len(valid_scores) if valid_scores else 0
+    # Overall counts and average predicted score, maintained incrementally on every write
+    summary = get_dashboard_summary()
     
     return render_template('faculty/dashboard.html', 
                           profile=profile,
-                          subjects=subjects,
-                          students=students,
-                          students_with_data=students_with_data,
-                          avg_predicted_score=avg_predicted_score)
+                          subject_count=summary.subject_count,
+                          student_count=summary.student_count,
+                          students_with_data=summary.students_with_data,
+                          avg_predicted_score=summary.avg_predicted_score)
 
 @faculty.route('/profile', methods=['GET', 'POST'])
-@login_required
+@role_required('faculty', profile=False)
 def profile():
-    if current_user.role != 'faculty':
-        flash('Access denied. You are not a faculty member.')
-        return redirect(url_for('auth.index'))
-    
-    profile = FacultyProfile.query.filter_by(user_id=current_user.id).first()
+    profile = current_profile()
     
     if request.method == 'POST':
         first_name = request.form.get('first_name')
@@ -86,12 +71,8 @@ def profile():
     return render_template('faculty/profile.html', profile=profile)
 
 @faculty.route('/subjects', methods=['GET', 'POST'])
-@login_required
+@role_required('faculty', profile=False)
 def subjects():
-    if current_user.role != 'faculty':
-        flash('Access denied. You are not a faculty member.')
-        return redirect(url_for('auth.index'))
-    
     if request.method == 'POST':
         name = request.form.get('name')
         code = request.form.get('code')
@@ -105,223 +86,171 @@ def subjects():
         # Create new subject
         subject = Subject(name=name, code=code)
         db.session.add(subject)
+        update_summary(subject_count=1)
         db.session.commit()
         flash('Subject added successfully!')
         return redirect(url_for('faculty.subjects'))
     
-    # Get all subjects
-    subjects = Subject.query.all()
+    # Get one page of subjects with their enrollment counts
+    sort = request.args.get('sort') if request.args.get('sort') in SUBJECT_SORTS else 'code'
+    search = request.args.get('q', '').strip()
+    sort_columns = SUBJECT_SORTS[sort]
+    enrolled_count = (select(func.count()).where(StudentSubject.subject_id == Subject.id)
+                      .correlate(Subject).scalar_subquery())
+    query = db.session.query(Subject, enrolled_count)
+    if search:
+        query = query.filter(prefix_filter(sort_columns[0], search))
+    page = keyset_paginate(query, sort_columns,
+                           key=lambda row: [getattr(row[0], column.key) for column in sort_columns],
+                           cursor=request.args.get('after'),
+                           per_page=per_page_arg(request.args.get('per_page')))
     
-    return render_template('faculty/subjects.html', subjects=subjects)
+    subjects = []
+    for subject, count in page:
+        subject.enrolled_count = count
+        subjects.append(subject)
+    
+    return render_template('faculty/subjects.html',
+                          subjects=subjects,
+                          page=page,
+                          sort=sort,
+                          search=search)
 
 @faculty.route('/students')
-@login_required
+@role_required('faculty')
 def students():
-    if current_user.role != 'faculty':
-        flash('Access denied. You are not a faculty member.')
-        return redirect(url_for('auth.index'))
+    profile = current_profile()
     
-    # Get faculty profile
-    profile = FacultyProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('faculty.profile'))
+    # Get one page of students with their user account and subject/performance counts in one query;
+    # the counts are correlated subqueries, so they only run for the rows on this page
+    sort = request.args.get('sort') if request.args.get('sort') in STUDENT_SORTS else 'last_name'
+    search = request.args.get('q', '').strip()
+    sort_columns = STUDENT_SORTS[sort]
+    subject_count = (select(func.count()).where(StudentSubject.student_id == StudentProfile.id)
+                     .correlate(StudentProfile).scalar_subquery())
+    performance_count = (select(func.count()).where(StudentPerformance.student_id == StudentProfile.id)
+                         .correlate(StudentProfile).scalar_subquery())
+    query = (db.session.query(StudentProfile, subject_count, performance_count)
+             .options(joinedload(StudentProfile.user)))
+    if search:
+        query = query.filter(prefix_filter(sort_columns[0], search))
+    page = keyset_paginate(query, sort_columns,
+                           key=lambda row: [getattr(row[0], column.key) for column in sort_columns],
+                           cursor=request.args.get('after'),
+                           per_page=per_page_arg(request.args.get('per_page')))
     
-    # Get all students with their related data
-    students = StudentProfile.query.all()
+    students = []
+    for student, subject_count, performance_count in page:
+        student.subject_count = subject_count
+        student.performance_count = performance_count
+        students.append(student)
     
-    # For each student, get their subjects and performance data
-    for student in students:
-        student.subject_count = StudentSubject.query.filter_by(student_id=student.id).count()
-        student.performance_count = StudentPerformance.query.filter_by(student_id=student.id).count()
+    return render_template('faculty/students.html',
+                          students=students,
+                          page=page,
+                          sort=sort,
+                          search=search,
+                          summary=get_dashboard_summary(),
+                          profile=profile)
+
+@faculty.route('/performance/import', methods=['GET', 'POST'])
+@role_required('faculty')
+def import_performance():
+    profile = current_profile()
     
-    return render_template('faculty/students.html', students=students, profile=profile)
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Please choose a CSV file to import.')
+            return redirect(url_for('faculty.import_performance'))
+        
+        # Parse the upload as a stream instead of reading it into memory
+        report = import_performance_csv(open_text_stream(upload.stream), filename=upload.filename)
+        flash(f'Imported {report.imported} performance record(s) from {upload.filename} '
+              f'with {report.error_count} error(s).')
+    
+    return render_template('faculty/import_performance.html',
+                          profile=profile,
+                          report=report,
+                          columns=REQUIRED_COLUMNS)
 
 @faculty.route('/student/<int:student_id>')
-@login_required
+@role_required('faculty')
 def student_details(student_id):
-    if current_user.role != 'faculty':
-        flash('Access denied. You are not a faculty member.')
-        return redirect(url_for('auth.index'))
-    
-    # Get faculty profile
-    profile = FacultyProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('faculty.profile'))
+    profile = current_profile()
     
     # Get student profile
     student = StudentProfile.query.get_or_404(student_id)
     
     # Get student's performance data
-    performances = StudentPerformance.query.filter_by(student_id=student_id).all()
-    
-    # Generate performance charts
-    charts = []
-    if performances:
-        # Prepare data for charts
-        subjects = [p.subject.name for p in performances if p.subject]
-        predicted_scores = [p.predicted_score for p in performances]
-        previous_grades = [p.previous_grade for p in performances]
-        attendance = [p.attendance_percentage for p in performances]
-        study_hours = [p.study_hours for p in performances]
-        
-        # Create bar chart comparing predicted scores with previous grades
-        plt.figure(figsize=(10, 6))
-        x = np.arange(len(subjects))
-        width = 0.35
-        
-        plt.bar(x - width/2, previous_grades, width, label='Previous Grade')
-        plt.bar(x + width/2, predicted_scores, width, label='Predicted Score')
-        
-        plt.xlabel('Subjects')
-        plt.ylabel('Score')
-        plt.title('Previous Grades vs Predicted Scores')
-        plt.xticks(x, subjects, rotation=45)
-        plt.legend()
-        plt.tight_layout()
-        
-        # Convert plot to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        comparison_chart = base64.b64encode(buf.getvalue()).decode('utf-8')
-        charts.append(('Grades Comparison', comparison_chart))
-        plt.close()
-        
-        # Create scatter plot of attendance vs predicted score
-        plt.figure(figsize=(8, 6))
-        plt.scatter(attendance, predicted_scores)
-        
-        for i, subject in enumerate(subjects):
-            plt.annotate(subject, (attendance[i], predicted_scores[i]))
-            
-        plt.xlabel('Attendance (%)')
-        plt.ylabel('Predicted Score')
-        plt.title('Attendance vs Predicted Score')
-        plt.grid(True)
-        
-        # Convert plot to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        attendance_chart = base64.b64encode(buf.getvalue()).decode('utf-8')
-        charts.append(('Attendance Impact', attendance_chart))
-        plt.close()
-        
-        # Create scatter plot of study hours vs predicted score
-        plt.figure(figsize=(8, 6))
-        plt.scatter(study_hours, predicted_scores)
-        
-        for i, subject in enumerate(subjects):
-            plt.annotate(subject, (study_hours[i], predicted_scores[i]))
-            
-        plt.xlabel('Study Hours per Week')
-        plt.ylabel('Predicted Score')
-        plt.title('Study Hours vs Predicted Score')
-        plt.grid(True)
-        
-        # Convert plot to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        study_chart = base64.b64encode(buf.getvalue()).decode('utf-8')
-        charts.append(('Study Hours Impact', study_chart))
-        plt.close()
+    performances = (StudentPerformance.query.options(joinedload(StudentPerformance.subject))
+                    .filter_by(student_id=student_id)
+                    .all())
     
+    # Charts are drawn in the browser from the JSON performance series
     return render_template('faculty/student_details.html', 
                           student=student,
                           performances=performances,
-                          charts=charts,
+                          data_url=url_for('api.student_performance', student_id=student_id),
                           profile=profile)
 
 @faculty.route('/analytics')
-@login_required
+@role_required('faculty', profile=False)
 def analytics():
-    if current_user.role != 'faculty':
-        flash('Access denied. You are not a faculty member.')
-        return redirect(url_for('auth.index'))
-    
-    # Get all performance data
-    performances = StudentPerformance.query.all()
-    
-    # Generate analytics charts
+    # Analytics charts are served (and cached) by analytics_chart
     charts = []
-    if performances:
-        # Prepare data
-        data = pd.DataFrame([
-            {
-                'student_id': p.student_id,
-                'student_name': f"{p.student.first_name} {p.student.last_name}",
-                'subject_id': p.subject_id,
-                'subject_name': p.subject.name,
-                'previous_grade': p.previous_grade,
-                'attendance': p.attendance_percentage,
-                'study_hours': p.study_hours,
-                'predicted_score': p.predicted_score
-            }
-            for p in performances
-        ])
-        
-        # Overall distribution of predicted scores
-        plt.figure(figsize=(10, 6))
-        plt.hist(data['predicted_score'], bins=10, alpha=0.7)
-        plt.xlabel('Predicted Score')
-        plt.ylabel('Number of Students')
-        plt.title('Distribution of Predicted Scores')
-        plt.grid(True)
-        
-        # Convert plot to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        score_dist_chart = base64.b64encode(buf.getvalue()).decode('utf-8')
-        charts.append(('Score Distribution', score_dist_chart))
-        plt.close()
-        
-        # Correlation between factors and predicted scores
-        plt.figure(figsize=(10, 6))
-        
-        # Calculate correlations
-        correlations = [
-            data['previous_grade'].corr(data['predicted_score']),
-            data['attendance'].corr(data['predicted_score']),
-            data['study_hours'].corr(data['predicted_score'])
+    has_scores = db.session.query(StudentPerformance.id).filter(
+        StudentPerformance.predicted_score.isnot(None)
+    ).first() is not None
+    if has_scores:
+        version = _analytics_chart_version()
+        charts = [
+            (title, url_for('faculty.analytics_chart', name=name, v=version))
+            for name, title in ANALYTICS_CHARTS
         ]
-        
-        factors = ['Previous Grade', 'Attendance', 'Study Hours']
-        
-        plt.bar(factors, correlations)
-        plt.xlabel('Factors')
-        plt.ylabel('Correlation with Predicted Score')
-        plt.title('Impact of Different Factors on Predicted Score')
-        plt.grid(True)
-        
-        # Convert plot to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        correlation_chart = base64.b64encode(buf.getvalue()).decode('utf-8')
-        charts.append(('Factor Impact', correlation_chart))
-        plt.close()
-        
-        # Average predicted score by subject
-        subject_avg = data.groupby('subject_name')['predicted_score'].mean().reset_index()
-        
-        plt.figure(figsize=(12, 6))
-        plt.bar(subject_avg['subject_name'], subject_avg['predicted_score'])
-        plt.xlabel('Subject')
-        plt.ylabel('Average Predicted Score')
-        plt.title('Average Predicted Score by Subject')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Convert plot to base64 string
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png')
-        buf.seek(0)
-        subject_chart = base64.b64encode(buf.getvalue()).decode('utf-8')
-        charts.append(('Subject Performance', subject_chart))
-        plt.close()
     
     return render_template('faculty/analytics.html', charts=charts)
+
+@faculty.route('/analytics/charts/<name>.png')
+@role_required('faculty', profile=False, abort_code=403)
+def analytics_chart(name):
+    if name not in dict(ANALYTICS_CHARTS):
+        abort(404)
+    
+    version = _analytics_chart_version()
+    
+    def render():
+        # Aggregate performance data in the database
+        summary = performance_analytics()
+        if not summary:
+            abort(404)
+        return render_analytics_chart(name, summary)
+    
+    return _chart_response(('analytics', name), version, render)
+
+
+def _analytics_chart_version():
+    return '.'.join(map(str, DataRevision.current('performance', 'predictions')))
+
+
+def _chart_response(key, version, render):
+    """
+    PNG response for a chart at the given data version
+    
+    Revalidation with a matching ETag costs no rendering at all; otherwise the chart
+    comes from the chart cache, rendering only on a miss. Pages link charts with the
+    version in the URL, so a matching ``v`` lets the browser keep the image.
+    """
+    etag = '-'.join(map(str, key + (version,)))
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(chart_cache.get_or_render(key + (version,), render))
+        response.mimetype = 'image/png'
+    response.set_etag(etag)
+    if request.args.get('v') == version:
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
@@ -1,32 +1,32 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
-from flask_login import login_required, current_user
-import pandas as pd
-import numpy as np
+from flask_login import current_user
+from sqlalchemy.orm import joinedload
 from app import db
-from app.models.user import StudentProfile, Subject, StudentSubject, StudentPerformance
-from app.models.ml_model import initialize_model
+from app.models.user import StudentProfile, Subject, StudentSubject, StudentPerformance, DataRevision
+from app.models.ml_model import get_predictor
+from app.services.access import current_profile, role_required
+from app.services.pagination import keyset_paginate, per_page_arg, prefix_filter
+from app.services.performance import validate_performance
+from app.services.summary import performance_deltas, update_summary
 
 student = Blueprint('student', __name__)
 
+# Subject listing sort options; the last column makes every sort key unique
+SUBJECT_SORTS = {
+    'code': (Subject.code, Subject.id),
+    'name': (Subject.name, Subject.id),
+}
+
 @student.route('/dashboard')
-@login_required
+@role_required('student')
 def dashboard():
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    # Get student profile
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('student.profile'))
+    profile = current_profile()
     
     # Get student subjects
-    student_subjects = StudentSubject.query.filter_by(student_id=profile.id).all()
-    subjects = [s.subject for s in student_subjects]
+    subjects = _enrolled_subjects(profile)
     
     # Get student performance data
-    performances = StudentPerformance.query.filter_by(student_id=profile.id).all()
+    performances = _performances(profile)
     
     return render_template('student/dashboard.html', 
                           profile=profile, 
@@ -34,13 +34,9 @@ def dashboard():
                           performances=performances)
 
 @student.route('/profile', methods=['GET', 'POST'])
-@login_required
+@role_required('student', profile=False)
 def profile():
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
+    profile = current_profile()
     
     if request.method == 'POST':
         first_name = request.form.get('first_name')
@@ -56,6 +52,7 @@ def profile():
                 roll_number=roll_number
             )
             db.session.add(profile)
+            update_summary(student_count=1)
         else:
             # Update existing profile
             profile.first_name = first_name
@@ -69,40 +66,43 @@ def profile():
     return render_template('student/profile.html', profile=profile)
 
 @student.route('/subjects', methods=['GET'])
-@login_required
+@role_required('student')
 def subjects():
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('student.profile'))
-    
-    # Get all available subjects
-    all_subjects = Subject.query.all()
+    profile = current_profile()
+    
+    # Get one page of the available subjects
+    sort = request.args.get('sort') if request.args.get('sort') in SUBJECT_SORTS else 'code'
+    search = request.args.get('q', '').strip()
+    sort_columns = SUBJECT_SORTS[sort]
+    query = Subject.query
+    if search:
+        query = query.filter(prefix_filter(sort_columns[0], search))
+    page = keyset_paginate(query, sort_columns,
+                           key=lambda subject: [getattr(subject, column.key) for column in sort_columns],
+                           cursor=request.args.get('after'),
+                           per_page=per_page_arg(request.args.get('per_page')))
     
     # Get student's enrolled subjects
-    student_subjects = StudentSubject.query.filter_by(student_id=profile.id).all()
-    enrolled_subject_ids = [s.subject_id for s in student_subjects]
+    enrolled_subjects = (Subject.query
+                         .join(StudentSubject, StudentSubject.subject_id == Subject.id)
+                         .filter(StudentSubject.student_id == profile.id)
+                         .order_by(Subject.name)
+                         .all())
+    enrolled_subject_ids = {subject.id for subject in enrolled_subjects}
     
     return render_template('student/subjects.html', 
-                          all_subjects=all_subjects, 
+                          all_subjects=page.items, 
+                          enrolled_subjects=enrolled_subjects,
                           enrolled_subject_ids=enrolled_subject_ids,
+                          page=page,
+                          sort=sort,
+                          search=search,
                           profile=profile)
 
 @student.route('/subjects/add', methods=['POST'])
-@login_required
+@role_required('student')
 def add_subject():
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('student.profile'))
+    profile = current_profile()
     
     name = request.form.get('name')
     code = request.form.get('code')
@@ -116,6 +116,7 @@ def add_subject():
     # Create new subject
     subject = Subject(name=name, code=code)
     db.session.add(subject)
+    update_summary(subject_count=1)
     db.session.commit()
     
     # Automatically enroll the student in the subject they created
@@ -130,16 +131,9 @@ def add_subject():
     return redirect(url_for('student.subjects'))
 
 @student.route('/subjects/enroll/<int:subject_id>', methods=['POST'])
-@login_required
+@role_required('student')
 def enroll_subject(subject_id):
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('student.profile'))
+    profile = current_profile()
     
     # Check if subject exists
     subject = Subject.query.get_or_404(subject_id)
@@ -165,16 +159,9 @@ def enroll_subject(subject_id):
     return redirect(url_for('student.subjects'))
 
 @student.route('/subjects/unenroll/<int:subject_id>', methods=['POST'])
-@login_required
+@role_required('student')
 def unenroll_subject(subject_id):
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('student.profile'))
+    profile = current_profile()
     
     # Find enrollment
     enrollment = StudentSubject.query.filter_by(
@@ -193,6 +180,16 @@ def unenroll_subject(subject_id):
             db.session.delete(performance)
         
         db.session.delete(enrollment)
+        if performances:
+            other_performance = StudentPerformance.query.filter(
+                StudentPerformance.student_id == profile.id,
+                StudentPerformance.subject_id != subject_id
+            ).first()
+            update_summary(performance_count=-len(performances),
+                           students_with_data=0 if other_performance else -1,
+                           **performance_deltas([p.predicted_score for p in performances],
+                                                [None] * len(performances)))
+            DataRevision.bump('performance', DataRevision.student_scope(profile.id))
         db.session.commit()
         flash('Successfully unenrolled from subject.')
     else:
@@ -201,44 +198,26 @@ def unenroll_subject(subject_id):
     return redirect(url_for('student.subjects'))
 
 @student.route('/performance', methods=['GET'])
-@login_required
+@role_required('student')
 def performance():
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('student.profile'))
+    profile = current_profile()
     
     # Get student's enrolled subjects
-    student_subjects = StudentSubject.query.filter_by(student_id=profile.id).all()
-    subjects = [s.subject for s in student_subjects]
+    subjects = _enrolled_subjects(profile)
     
     # Get performance data
-    performances = StudentPerformance.query.filter_by(student_id=profile.id).all()
+    performances = _performances(profile)
     
     return render_template('student/performance.html', 
                           profile=profile,
                           subjects=subjects,
-                          performances=performances)
+                          performances=performances,
+                          data_url=url_for('api.student_performance', student_id=profile.id))
 
 @student.route('/performance/add', methods=['GET', 'POST'])
-@login_required
+@role_required('student')
 def add_performance():
-    if current_user.role != 'student':
-        flash('Access denied. You are not a student.')
-        return redirect(url_for('auth.index'))
-    
-    profile = StudentProfile.query.filter_by(user_id=current_user.id).first()
-    if not profile:
-        flash('Please complete your profile first.')
-        return redirect(url_for('student.profile'))
-    
-    # Get student's enrolled subjects
-    student_subjects = StudentSubject.query.filter_by(student_id=profile.id).all()
-    subjects = [s.subject for s in student_subjects]
+    profile = current_profile()
     
     if request.method == 'POST':
         subject_id = request.form.get('subject_id')
@@ -248,20 +227,9 @@ def add_performance():
         study_hours = float(request.form.get('study_hours'))
         
         # Validate input
-        if previous_grade < 0 or previous_grade > 100:
-            flash('Previous grade must be between 0 and 100.')
-            return redirect(url_for('student.add_performance'))
-        
-        if current_grade < 0 or current_grade > 100:
-            flash('Current grade must be between 0 and 100.')
-            return redirect(url_for('student.add_performance'))
-        
-        if attendance < 0 or attendance > 100:
-            flash('Attendance must be between 0 and 100.')
-            return redirect(url_for('student.add_performance'))
-        
-        if study_hours < 0:
-            flash('Study hours cannot be negative.')
+        error = validate_performance(previous_grade, current_grade, attendance, study_hours)
+        if error:
+            flash(error)
             return redirect(url_for('student.add_performance'))
         
         # Check if performance data already exists for this subject
@@ -270,9 +238,15 @@ def add_performance():
             subject_id=subject_id
         ).first()
         
+        # Whether this is the student's first performance record, for the dashboard summary
+        had_data = existing_performance is not None or StudentPerformance.query.filter_by(
+            student_id=profile.id
+        ).first() is not None
+        old_score = existing_performance.predicted_score if existing_performance else None
+        
         # Predict performance using ML model
-        predictor = initialize_model()
-        features = np.array([[previous_grade, current_grade, attendance, study_hours]])
+        predictor = get_predictor()
+        features = [[previous_grade, current_grade, attendance, study_hours]]
         predicted_score = predictor.predict(features)
         
         if existing_performance:
@@ -295,10 +269,32 @@ def add_performance():
             )
             db.session.add(performance)
         
+        update_summary(performance_count=0 if existing_performance else 1,
+                       students_with_data=0 if had_data else 1,
+                       **performance_deltas([old_score], [predicted_score]))
+        DataRevision.bump('performance', DataRevision.student_scope(profile.id))
         db.session.commit()
         flash('Performance data saved successfully!')
         return redirect(url_for('student.performance'))
     
+    # Get student's enrolled subjects; only the form needs them
+    subjects = _enrolled_subjects(profile)
+    
     return render_template('student/add_performance.html', 
                           profile=profile,
                           subjects=subjects)
+
+
+def _enrolled_subjects(profile):
+    """Subjects the student is enrolled in, fetched with the enrollments in one query"""
+    enrollments = (StudentSubject.query.options(joinedload(StudentSubject.subject))
+                   .filter_by(student_id=profile.id)
+                   .all())
+    return [enrollment.subject for enrollment in enrollments]
+
+
+def _performances(profile):
+    """Performance records of the student with their subjects, in one query"""
+    return (StudentPerformance.query.options(joinedload(StudentPerformance.subject))
+            .filter_by(student_id=profile.id)
+            .all())
@@ -0,0 +1,85 @@
+import time
+from functools import wraps
+from flask import abort, current_app, flash, g, redirect, session, url_for
+from flask_login import current_user
+
+# Flash message when a user opens a page meant for another role
+ACCESS_DENIED = {
+    'student': 'Access denied. You are not a student.',
+    'faculty': 'Access denied. You are not a faculty member.',
+}
+
+# Session key of the cached (user id, role, profile id, expiry)
+IDENTITY_SESSION_KEY = 'identity'
+
+
+def current_profile():
+    """
+    Student or faculty profile of the logged-in user, or None if not created yet
+    
+    ``load_user`` fetches both profiles with the user in one joined query, so this
+    never queries; the result is kept on ``g`` for the rest of the request.
+    """
+    if 'profile' not in g:
+        g.profile = current_user.student_profile if current_user.role == 'student' else current_user.faculty_profile
+    return g.profile
+
+
+def current_identity():
+    """
+    ``(role, profile_id)`` of the logged-in user, or None for anonymous requests
+    
+    With ``ROLE_CACHE_SECONDS`` set, the pair is cached in the (signed) session for
+    that long, and requests that only need the role and profile id (the JSON API,
+    chart images) skip loading the user altogether. A cached pair is only trusted
+    for the user id Flask-Login has in the same session.
+    """
+    if 'identity' in g:
+        return g.identity
+    
+    ttl = current_app.config['ROLE_CACHE_SECONDS']
+    cached = session.get(IDENTITY_SESSION_KEY) if ttl else None
+    if cached and str(cached[0]) == str(session.get('_user_id')) and cached[3] > time.time():
+        g.identity = (cached[1], cached[2])
+        return g.identity
+    
+    if not current_user.is_authenticated:
+        return None
+    profile = current_profile()
+    g.identity = (current_user.role, profile.id if profile else None)
+    # Without a profile yet, the user is about to create one; don't cache the gap
+    if ttl and profile is not None:
+        session[IDENTITY_SESSION_KEY] = [current_user.id, current_user.role, profile.id, time.time() + ttl]
+    return g.identity
+
+
+def role_required(*roles, profile=True, abort_code=None):
+    """
+    Restrict a view to logged-in users with one of ``roles``
+    
+    Anonymous users go to the login page. Users with another role are flashed
+    ``ACCESS_DENIED`` and sent to the index, or get ``abort_code`` when one is
+    given (JSON and image endpoints). With ``profile`` the user must also have
+    completed their profile and is redirected to the profile page otherwise.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            identity = current_identity()
+            if identity is None:
+                return current_app.login_manager.unauthorized()
+            
+            role, profile_id = identity
+            if role not in roles:
+                if abort_code:
+                    abort(abort_code)
+                flash(ACCESS_DENIED[roles[0]])
+                return redirect(url_for('auth.index'))
+            if profile and profile_id is None:
+                if abort_code:
+                    abort(abort_code)
+                flash('Please complete your profile first.')
+                return redirect(url_for(f'{role}.profile'))
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
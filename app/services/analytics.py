@@ -0,0 +1,107 @@
+import math
+from sqlalchemy import Integer, case, cast, func
+from app.models.user import Subject, StudentPerformance
+from app.services.database import read_session
+
+# Factors shown on the correlation chart, with their display names
+CORRELATION_FACTORS = [
+    ('previous_grade', 'Previous Grade'),
+    ('attendance_percentage', 'Attendance'),
+    ('study_hours', 'Study Hours'),
+]
+
+
+def performance_analytics(bins=10):
+    """
+    Aggregates behind the faculty analytics page, computed in the database
+    
+    Returns None when no performance has a predicted score, otherwise a dict with
+    ``count``, ``histogram`` (bucket counts and edges of the predicted scores),
+    ``correlations`` (Pearson r of each factor with the predicted score) and
+    ``subject_averages`` (list of (subject name, average predicted score)).
+    """
+    sums = _moment_sums()
+    if not sums['n']:
+        return None
+    
+    return {
+        'count': sums['n'],
+        'histogram': score_histogram(bins, sums['min_score'], sums['max_score']),
+        'correlations': [
+            (label, _pearson(sums['n'], sums[f'sum_{name}'], sums['sum_score'], sums[f'sum_{name}_sq'],
+                             sums['sum_score_sq'], sums[f'sum_{name}_score']))
+            for name, label in CORRELATION_FACTORS
+        ],
+        'subject_averages': subject_averages(),
+    }
+
+
+def subject_averages():
+    """Average predicted score per subject name, ordered by name"""
+    return [
+        (name, float(average))
+        for name, average in read_session().query(Subject.name, func.avg(StudentPerformance.predicted_score))
+        .join(StudentPerformance, StudentPerformance.subject_id == Subject.id)
+        .filter(StudentPerformance.predicted_score.isnot(None))
+        .group_by(Subject.name)
+        .order_by(Subject.name)
+    ]
+
+
+def score_histogram(bins, min_score, max_score):
+    """
+    Bucket counts of the predicted scores, matching ``numpy.histogram(scores, bins)``
+    
+    Returns ``(counts, edges)`` where ``edges`` has ``bins + 1`` entries.
+    """
+    score = StudentPerformance.predicted_score
+    if max_score == min_score:
+        # Same convention as NumPy: a unit-wide range centred on the single value
+        low, high = min_score - 0.5, max_score + 0.5
+    else:
+        low, high = min_score, max_score
+    width = (high - low) / bins
+    edges = [low + i * width for i in range(bins)] + [high]
+    
+    # floor() before the cast: PostgreSQL and MySQL round when casting to an integer.
+    # The maximum belongs to the last bucket
+    bucket = cast(func.floor((score - low) / width), Integer)
+    bucket = case((bucket >= bins, bins - 1), else_=bucket)
+    
+    counts = [0] * bins
+    for index, count in (read_session().query(bucket, func.count())
+                         .filter(score.isnot(None))
+                         .group_by(bucket)):
+        counts[int(index)] = count
+    return counts, edges
+
+
+def _moment_sums():
+    """Count, min/max and the sums needed for Pearson correlation, in one query"""
+    score = StudentPerformance.predicted_score
+    columns = [
+        func.count(score).label('n'),
+        func.min(score).label('min_score'),
+        func.max(score).label('max_score'),
+        func.sum(score).label('sum_score'),
+        func.sum(score * score).label('sum_score_sq'),
+    ]
+    for name, _ in CORRELATION_FACTORS:
+        factor = getattr(StudentPerformance, name)
+        columns += [
+            func.sum(factor).label(f'sum_{name}'),
+            func.sum(factor * factor).label(f'sum_{name}_sq'),
+            func.sum(factor * score).label(f'sum_{name}_score'),
+        ]
+    row = read_session().query(*columns).filter(score.isnot(None)).one()
+    return row._asdict()
+
+
+def _pearson(n, sum_x, sum_y, sum_xx, sum_yy, sum_xy):
+    """Pearson correlation from running sums; NaN when either side is constant"""
+    covariance = n * sum_xy - sum_x * sum_y
+    variance_x = n * sum_xx - sum_x * sum_x
+    variance_y = n * sum_yy - sum_y * sum_y
+    if n < 2 or variance_x <= 0 or variance_y <= 0:
+        return float('nan')
+    return covariance / math.sqrt(variance_x * variance_y)
@@ -0,0 +1,130 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+# Chart names served by the faculty analytics chart endpoint, with their page titles
+ANALYTICS_CHARTS = [
+    ('score-distribution', 'Score Distribution'),
+    ('factor-impact', 'Factor Impact'),
+    ('subject-performance', 'Subject Performance'),
+]
+
+
+class ChartCache:
+    """
+    Thread-safe LRU cache of rendered PNG charts
+    
+    Entries are keyed by chart name, scope and data version, so a write that bumps
+    the version makes old entries unreachable; they age out through LRU eviction,
+    which keeps the cache within ``max_entries`` and ``max_bytes``.
+    """
+    
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_or_render(self, key, render):
+        """Return the cached PNG for ``key``, calling ``render()`` on a miss"""
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+        
+        # Render outside the lock; concurrent misses for one key just render twice
+        png = render()
+        if len(png) > self.max_bytes:
+            return png
+        
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = png
+                self._bytes += len(png)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+        return png
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+chart_cache = ChartCache(
+    max_entries=int(os.environ.get('CHART_CACHE_MAX_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('CHART_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+)
+
+
+def _figure(**kwargs):
+    # matplotlib is imported on the first render, not when the routes are loaded
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+
+def _to_png(figure):
+    buf = io.BytesIO()
+    figure.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def render_analytics_chart(name, summary):
+    """Render one of the ``ANALYTICS_CHARTS`` from ``performance_analytics()`` output"""
+    if name == 'score-distribution':
+        # Overall distribution of predicted scores
+        counts, edges = summary['histogram']
+        figure = _figure(figsize=(10, 6))
+        ax = figure.subplots()
+        ax.hist(edges[:-1], bins=edges, weights=counts, alpha=0.7)
+        ax.set_xlabel('Predicted Score')
+        ax.set_ylabel('Number of Students')
+        ax.set_title('Distribution of Predicted Scores')
+        ax.grid(True)
+        return _to_png(figure)
+    
+    if name == 'factor-impact':
+        # Correlation between factors and predicted scores
+        figure = _figure(figsize=(10, 6))
+        ax = figure.subplots()
+        ax.bar([factor for factor, _ in summary['correlations']],
+               [correlation for _, correlation in summary['correlations']])
+        ax.set_xlabel('Factors')
+        ax.set_ylabel('Correlation with Predicted Score')
+        ax.set_title('Impact of Different Factors on Predicted Score')
+        ax.grid(True)
+        return _to_png(figure)
+    
+    if name == 'subject-performance':
+        # Average predicted score by subject
+        figure = _figure(figsize=(12, 6))
+        ax = figure.subplots()
+        ax.bar([subject for subject, _ in summary['subject_averages']],
+               [average for _, average in summary['subject_averages']])
+        ax.set_xlabel('Subject')
+        ax.set_ylabel('Average Predicted Score')
+        ax.set_title('Average Predicted Score by Subject')
+        ax.tick_params(axis='x', labelrotation=45)
+        figure.tight_layout()
+        return _to_png(figure)
+    
+    raise KeyError(name)
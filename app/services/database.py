@@ -0,0 +1,122 @@
+import sqlalchemy as sa
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+# Bind key of the read-only connection used for analytics queries
+ANALYTICS_BIND = 'analytics'
+
+# Statements that make every transaction on a server connection read-only
+READ_ONLY_STATEMENTS = {
+    'postgresql': 'SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY',
+    'mysql': 'SET SESSION TRANSACTION READ ONLY',
+}
+
+
+def configure_database(app):
+    """
+    Engine options and binds derived from the ``DB_*``, ``SQLITE_*`` and ``ANALYTICS_*`` config
+    
+    Call before ``db.init_app``. Server databases get the pool settings (with
+    pre-ping, so connections dropped by the server are replaced transparently);
+    SQLite keeps its default pool and is tuned with pragmas by ``init_database_events``.
+    Analytics queries go to ``ANALYTICS_DATABASE_URL`` (e.g. a replica) when set or,
+    with ``ANALYTICS_READ_ONLY`` on SQLite, to a read-only connection to the same file.
+    """
+    url = sa.engine.make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options(app, url)
+    
+    analytics_url = None
+    if app.config['ANALYTICS_DATABASE_URL']:
+        analytics_url = sa.engine.make_url(app.config['ANALYTICS_DATABASE_URL'])
+    elif app.config['ANALYTICS_READ_ONLY'] and _is_sqlite_file(url):
+        database = url.database[5:] if url.query.get('uri') else url.database
+        analytics_url = url.set(database=f'file:{database}', query={'mode': 'ro', 'uri': 'true'})
+    if analytics_url is not None:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[ANALYTICS_BIND] = {
+            'url': analytics_url, **_engine_options(app, analytics_url),
+        }
+    
+    app.teardown_appcontext(_close_read_session)
+
+
+def init_database_events(app, engines):
+    """Apply the SQLite pragmas to every new connection and keep the analytics bind read-only"""
+    for bind_key, engine in engines.items():
+        read_only = bind_key == ANALYTICS_BIND
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _sqlite_pragmas(app.config, read_only))
+        elif read_only and engine.dialect.name in READ_ONLY_STATEMENTS:
+            event.listen(engine, 'connect', _read_only_session(READ_ONLY_STATEMENTS[engine.dialect.name]))
+
+
+def read_session():
+    """
+    Session for read-only analytics queries
+    
+    Uses the analytics bind when one is configured, so long aggregations never hold
+    up writers on the primary; otherwise the regular ``db.session``.
+    """
+    engine = db.engines.get(ANALYTICS_BIND)
+    if engine is None:
+        return db.session
+    if 'read_session' not in g:
+        g.read_session = Session(engine)
+    return g.read_session
+
+
+def _engine_options(app, url):
+    if url.get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_recycle': app.config['DB_POOL_RECYCLE'],
+        'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+        'pool_pre_ping': True,
+    }
+
+
+def _is_sqlite_file(url):
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def _sqlite_pragmas(config, read_only):
+    pragmas = []
+    if read_only:
+        pragmas.append('query_only=ON')
+    elif config['SQLITE_WAL']:
+        # Readers no longer wait for writers, and commits only sync at checkpoints
+        pragmas += ['journal_mode=WAL', 'synchronous=NORMAL']
+    pragmas += [
+        f"busy_timeout={config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"mmap_size={config['SQLITE_MMAP_SIZE']}",
+        # A negative cache_size is in KiB rather than pages
+        f"cache_size={-config['SQLITE_CACHE_SIZE_KB']}",
+    ]
+    
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f'PRAGMA {pragma}')
+        cursor.close()
+    
+    return set_pragmas
+
+
+def _read_only_session(statement):
+    def set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(statement)
+        cursor.close()
+        # psycopg2 opens a transaction for the SET; end it so the setting isn't rolled back
+        dbapi_connection.commit()
+    
+    return set_read_only
+
+
+def _close_read_session(exception=None):
+    session = g.pop('read_session', None)
+    if session is not None:
+        session.close()
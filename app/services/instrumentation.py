@@ -0,0 +1,125 @@
+import json
+import logging
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('app.sql')
+
+
+class RequestQueryStats:
+    """SQL statements executed while handling one request"""
+    
+    def __init__(self, track_statements=False):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.statements = Counter() if track_statements else None
+    
+    def record(self, statement, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements[statement] += 1
+    
+    def server_timing(self):
+        """``Server-Timing`` header value: total DB time, slowest statement and whole request"""
+        return ', '.join([
+            f'db;dur={self.total_seconds * 1000:.2f};desc="{self.count} queries"',
+            f'db-slowest;dur={self.slowest_seconds * 1000:.2f}',
+            f'app;dur={(time.perf_counter() - self.started) * 1000:.2f}',
+        ])
+
+
+def init_sql_instrumentation(app, engines):
+    """
+    Record the queries of every request made to ``app``
+    
+    Each response gets a ``Server-Timing`` header and, unless ``SQL_LOG_REQUESTS``
+    is off, one JSON log line on the ``app.sql`` logger. Statements slower than
+    ``SQL_SLOW_QUERY_MS`` are logged with their route; with ``SQL_DETECT_N_PLUS_ONE``
+    on, a statement repeated ``SQL_N_PLUS_ONE_REPEATS`` times in one request is
+    flagged as a likely N+1. Queries run outside a request (scripts, migrations)
+    are not tracked.
+    """
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    
+    slow_seconds = app.config['SQL_SLOW_QUERY_MS'] / 1000
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+    
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_start_time'].pop()
+        if not has_request_context():
+            return
+        stats = g.get('sql_stats')
+        if stats is None:
+            return
+        stats.record(statement, seconds)
+        if seconds >= slow_seconds:
+            logger.warning(json.dumps({
+                'event': 'slow_query',
+                'endpoint': request.endpoint,
+                'path': request.path,
+                'ms': round(seconds * 1000, 2),
+                'statement': statement,
+            }))
+    
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is not None and context.connection.info.get('query_start_time'):
+            context.connection.info['query_start_time'].pop()
+    
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+        event.listen(engine, 'handle_error', handle_error)
+    
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = RequestQueryStats(track_statements=app.config['SQL_DETECT_N_PLUS_ONE'])
+    
+    @app.after_request
+    def report_sql_stats(response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+        
+        response.headers['Server-Timing'] = stats.server_timing()
+        
+        if stats.statements is not None:
+            for statement, repeats in stats.statements.items():
+                if repeats >= app.config['SQL_N_PLUS_ONE_REPEATS']:
+                    logger.warning(json.dumps({
+                        'event': 'n_plus_one',
+                        'endpoint': request.endpoint,
+                        'path': request.path,
+                        'repeats': repeats,
+                        'statement': statement,
+                    }))
+        
+        if app.config['SQL_LOG_REQUESTS']:
+            logger.info(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'queries': stats.count,
+                'db_ms': round(stats.total_seconds * 1000, 2),
+                'slowest_ms': round(stats.slowest_seconds * 1000, 2),
+                'slowest_statement': stats.slowest_statement,
+                'duration_ms': round((time.perf_counter() - stats.started) * 1000, 2),
+            }))
+        return response
@@ -0,0 +1,185 @@
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime
+import numpy as np
+from app.models.ml_model import StudentPerformancePredictor, compact_model
+
+# Hyperparameter grid per model family; each combination is one candidate
+SEARCH_SPACE = {
+    'random_forest': {'n_estimators': [50, 100, 200], 'max_depth': [None, 8, 16]},
+    'extra_trees': {'n_estimators': [50, 100, 200], 'max_depth': [None, 8, 16]},
+    'gradient_boosting': {'n_estimators': [100, 200], 'max_depth': [2, 3]},
+}
+
+DEFAULT_BUDGET_SECONDS = 300
+DEFAULT_CV_FOLDS = 5
+
+# The chosen model needs at least this mean cross-validated R² ...
+DEFAULT_MIN_R2 = 0.8
+# ... and must score a single row within this many milliseconds (median)
+DEFAULT_MAX_LATENCY_MS = 5.0
+
+# Rows timed one at a time to measure the per-row latency
+LATENCY_ROWS = 200
+
+SEARCH_REPORT_NAME = 'performance_search.json'
+
+# Training data of a pool worker, set once per process by _init_worker
+_worker_data = None
+
+
+def search_candidates(space=SEARCH_SPACE):
+    """``(family, params)`` for every combination in the grid, cheapest forests first"""
+    candidates = []
+    for family, grid in space.items():
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            candidates.append((family, dict(zip(names, values))))
+    return sorted(candidates, key=lambda candidate: candidate[1].get('n_estimators', 0))
+
+
+def build_estimator(family, params):
+    """Unfitted regressor of ``family`` with ``params`` and a fixed seed"""
+    from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+    families = {
+        'random_forest': RandomForestRegressor,
+        'extra_trees': ExtraTreesRegressor,
+        'gradient_boosting': GradientBoostingRegressor,
+    }
+    return families[family](random_state=42, **params)
+
+
+def search_model(X, y, sample_weight=None, predictor=None, budget_seconds=DEFAULT_BUDGET_SECONDS,
+                 min_r2=DEFAULT_MIN_R2, max_latency_ms=DEFAULT_MAX_LATENCY_MS, cv_folds=DEFAULT_CV_FOLDS,
+                 workers=None, report_path=None):
+    """
+    Pick the most accurate candidate that meets both targets, train it and save it
+    
+    Every candidate of ``SEARCH_SPACE`` is cross-validated and timed in a process
+    pool (one worker per core unless ``workers`` is given). Candidates still
+    pending when ``budget_seconds`` run out are dropped and the pool is stopped.
+    Among the finished candidates with a mean CV R² of at least ``min_r2`` and a
+    median single-row latency, in the form it would be served, of at most
+    ``max_latency_ms``, the one with the best R² is trained through
+    ``predictor.train`` and saved. If none qualifies the current model is kept.
+    
+    The report is written as JSON into the published version's directory and returned.
+    """
+    predictor = predictor or StudentPerformancePredictor()
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    candidates = search_candidates()
+    workers = workers or os.cpu_count() or 1
+    
+    started_at = datetime.now()
+    start = time.perf_counter()
+    deadline = start + budget_seconds
+    
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(X, y, sample_weight, cv_folds))
+    try:
+        pending = [(family, params, pool.apply_async(_evaluate_candidate, (family, params)))
+                   for family, params in candidates]
+        results = []
+        for family, params, pending_result in pending:
+            try:
+                result = pending_result.get(timeout=max(deadline - time.perf_counter(), 0))
+            except multiprocessing.TimeoutError:
+                result = {'status': 'timed_out'}
+            result.update(family=family, params=params)
+            if result['status'] == 'ok':
+                result['meets_targets'] = result['cv_r2_mean'] >= min_r2 and result['latency_ms'] <= max_latency_ms
+            results.append(result)
+    finally:
+        # Stops candidates still running past the budget
+        pool.terminate()
+        pool.join()
+    
+    qualified = [result for result in results if result.get('meets_targets')]
+    chosen = max(qualified, key=lambda result: (result['cv_r2_mean'], -result['latency_ms']), default=None)
+    
+    holdout = None
+    if chosen is not None:
+        holdout = predictor.train(X, y, sample_weight=sample_weight,
+                                  estimator=build_estimator(chosen['family'], chosen['params']))
+    
+    report = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'seconds': round(time.perf_counter() - start, 2),
+        'budget_seconds': budget_seconds,
+        'workers': workers,
+        'rows': len(y),
+        'cv_folds': cv_folds,
+        'targets': {'min_r2': min_r2, 'max_latency_ms': max_latency_ms},
+        'chosen': None if chosen is None else {'family': chosen['family'], 'params': chosen['params']},
+        'holdout': holdout,
+        'candidates': results,
+    }
+    if report_path is None:
+        # Next to the version the search published; a search that kept the current
+        # model writes to the store root instead, leaving that version's report alone
+        if chosen is None and predictor.store is not None:
+            os.makedirs(predictor.store.root, exist_ok=True)
+            report_path = os.path.join(predictor.store.root, SEARCH_REPORT_NAME)
+        else:
+            report_path = os.path.join(os.path.dirname(predictor.model_path), SEARCH_REPORT_NAME)
+    tmp_path = f'{report_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, report_path)
+    return report
+
+
+def _init_worker(X, y, sample_weight, cv_folds):
+    global _worker_data
+    _worker_data = (X, y, sample_weight, cv_folds)
+
+
+def _evaluate_candidate(family, params):
+    """Cross-validate one candidate, then time it scoring single rows; runs in a pool worker"""
+    from sklearn.model_selection import KFold, cross_validate
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    
+    X, y, sample_weight, cv_folds = _worker_data
+    try:
+        pipeline = make_pipeline(StandardScaler(), build_estimator(family, params))
+        fit_params = None if sample_weight is None else {pipeline.steps[-1][0] + '__sample_weight': sample_weight}
+        fit_start = time.perf_counter()
+        scores = cross_validate(pipeline, X, y, cv=KFold(cv_folds, shuffle=True, random_state=42),
+                                scoring=('r2', 'neg_root_mean_squared_error'), fit_params=fit_params)
+        cv_seconds = time.perf_counter() - fit_start
+        
+        # Time the model the way it would be served: compact when it can be exported
+        pipeline.fit(X, y, **(fit_params or {}))
+        scaler, model = pipeline.steps[0][1], pipeline.steps[-1][1]
+        try:
+            scaler, model = compact_model(model, scaler)
+        except TypeError:
+            pass
+        latency_ms = _row_latency_ms(scaler, model, X[:LATENCY_ROWS])
+    except Exception as e:
+        return {'status': 'failed', 'error': f'{e.__class__.__name__}: {e}'}
+    
+    return {
+        'status': 'ok',
+        'cv_r2_mean': float(np.mean(scores['test_r2'])),
+        'cv_r2_std': float(np.std(scores['test_r2'])),
+        'cv_rmse_mean': float(-np.mean(scores['test_neg_root_mean_squared_error'])),
+        'cv_seconds': round(cv_seconds, 3),
+        'latency_ms': round(latency_ms, 4),
+    }
+
+
+def _row_latency_ms(scaler, model, rows):
+    """Median time to scale and score one row"""
+    model.predict(scaler.transform(rows[:1]))
+    timings = []
+    for i in range(len(rows)):
+        row = rows[i:i + 1]
+        start = time.perf_counter()
+        model.predict(scaler.transform(row))
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
@@ -0,0 +1,100 @@
+import base64
+import json
+from sqlalchemy import and_, tuple_
+
+DEFAULT_PER_PAGE = 25
+MAX_PER_PAGE = 100
+
+# Highest code point; no character sorts after it
+MAX_CHAR = chr(0x10FFFF)
+
+# UTF-16 surrogates can't be encoded, so incrementing past U+D7FF skips them
+SURROGATES = (0xD800, 0xDFFF)
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing"""
+    
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    def __iter__(self):
+        return iter(self.items)
+    
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length=None):
+    """
+    Sort-key values from a cursor, or None for a missing or malformed cursor
+    
+    Cursors come back from the client, so anything but a list of ``length`` plain
+    strings and numbers is treated as malformed rather than bound into a query.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or (length is not None and len(values) != length):
+        return None
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        return None
+    return values
+
+
+def per_page_arg(value):
+    """Page size from a request argument, clamped to 1..MAX_PER_PAGE"""
+    try:
+        return max(1, min(int(value), MAX_PER_PAGE))
+    except (TypeError, ValueError):
+        return DEFAULT_PER_PAGE
+
+
+def prefix_filter(column, prefix):
+    """``column`` starts with ``prefix`` as a range condition that can use an index on ``column``"""
+    # Strings starting with the prefix sort below the prefix with its last character
+    # incremented; trailing U+10FFFF can't be incremented and is dropped first
+    stem = prefix.rstrip(MAX_CHAR)
+    if not stem:
+        return column >= prefix
+    code_point = ord(stem[-1]) + 1
+    if SURROGATES[0] <= code_point <= SURROGATES[1]:
+        code_point = SURROGATES[1] + 1
+    upper = stem[:-1] + chr(code_point)
+    return and_(column >= prefix, column < upper)
+
+
+def keyset_paginate(query, sort_columns, key, cursor=None, per_page=DEFAULT_PER_PAGE):
+    """
+    Fetch the page of ``query`` that follows ``cursor``
+    
+    ``sort_columns`` is the ordering of the listing and must end with a unique column
+    (the primary key) so every row has a distinct position; ``key(item)`` returns
+    the values of those columns for a result item. Instead of an OFFSET, the next
+    page starts with a seek on the sort key of the last row shown, so with an index
+    on ``sort_columns`` every page costs the same however deep it is.
+    """
+    values = decode_cursor(cursor, len(sort_columns))
+    if values is not None:
+        # Row-value comparison: (c1, c2, ...) > (v1, v2, ...) seeks straight into the index
+        query = query.filter(tuple_(*sort_columns) > tuple_(*values))
+    
+    items = query.order_by(*sort_columns).limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor(list(key(items[-1])))
+    return KeysetPage(items, next_cursor)
+
@@ -0,0 +1,26 @@
+import math
+
+
+def validate_performance(previous_grade, current_grade, attendance, study_hours):
+    """
+    Check performance values against the form rules
+    
+    Returns an error message for the first invalid value, or None if all are valid.
+    """
+    # NaN fails every comparison below, so it has to be rejected explicitly
+    if not all(math.isfinite(value) for value in (previous_grade, current_grade, attendance, study_hours)):
+        return 'Grades, attendance and study hours must be finite numbers.'
+    
+    if previous_grade < 0 or previous_grade > 100:
+        return 'Previous grade must be between 0 and 100.'
+    
+    if current_grade < 0 or current_grade > 100:
+        return 'Current grade must be between 0 and 100.'
+    
+    if attendance < 0 or attendance > 100:
+        return 'Attendance must be between 0 and 100.'
+    
+    if study_hours < 0:
+        return 'Study hours cannot be negative.'
+    
+    return None
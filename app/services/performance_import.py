@@ -0,0 +1,240 @@
+import csv
+import io
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models.user import StudentProfile, Subject, StudentSubject, StudentPerformance, DataRevision
+from app.models.ml_model import get_predictor
+from app.services.performance import validate_performance
+from app.services.summary import performance_deltas, update_summary
+
+# CSV columns, in the order the predictor expects the numeric ones
+REQUIRED_COLUMNS = ['roll_number', 'subject_code', 'previous_grade', 'current_grade', 'attendance', 'study_hours']
+
+# Columns that may be left out; a blank cell leaves the stored value unchanged
+OPTIONAL_COLUMNS = ['actual_score']
+
+# Alternative header names accepted for a column
+COLUMN_ALIASES = {'attendance_percentage': 'attendance'}
+
+DEFAULT_BATCH_SIZE = 500
+
+# Stop collecting error details after this many, but keep counting
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    """Outcome of importing one CSV file"""
+    
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.enrolled = 0
+        self.error_count = 0
+        self.errors = []
+    
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+    
+    @property
+    def imported(self):
+        return self.inserted + self.updated
+    
+    def to_dict(self):
+        return {
+            'filename': self.filename,
+            'rows': self.rows,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'enrolled': self.enrolled,
+            'error_count': self.error_count,
+            'errors': [{'line': line, 'error': message} for line, message in self.errors],
+        }
+
+
+def open_text_stream(binary_stream):
+    """Wrap an uploaded (binary) file so the CSV reader can consume it incrementally"""
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+
+def import_performance_csv(stream, filename=None, batch_size=DEFAULT_BATCH_SIZE, predictor=None):
+    """
+    Import performance records from a CSV text stream
+    
+    Rows are read one at a time, validated with the same rules as the
+    performance form, and written in chunks of ``batch_size``: each chunk is
+    scored with one ``predict_batch`` call and upserted with bulk statements.
+    Rows for a roll number / subject code pair that already has performance
+    data update it; students are enrolled in the subject if they were not yet.
+    An optional ``actual_score`` column records the observed final score, which
+    the model can later be trained on.
+    Invalid rows are skipped and reported with their line number. A file that
+    isn't UTF-8 text or isn't valid CSV is reported as a file-level error; rows
+    read before the problem are still imported.
+    """
+    report = ImportReport(filename)
+    reader = csv.reader(stream)
+    
+    try:
+        header = next(reader, None)
+    except (UnicodeDecodeError, csv.Error) as e:
+        report.add_error(1, _unreadable_file_message(e))
+        return report
+    if header is None:
+        report.add_error(1, 'The file is empty.')
+        return report
+    
+    columns = [COLUMN_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        report.add_error(1, f"Missing required column(s): {', '.join(missing)}.")
+        return report
+    positions = [columns.index(name) for name in REQUIRED_COLUMNS]
+    actual_score_position = columns.index('actual_score') if 'actual_score' in columns else None
+    
+    predictor = predictor or get_predictor()
+    
+    # Resolve roll numbers and subject codes in memory instead of per row
+    student_ids = dict(db.session.query(StudentProfile.roll_number, StudentProfile.id))
+    subject_ids = dict(db.session.query(Subject.code, Subject.id))
+    
+    batch = {}
+    for line, row in _numbered_rows(reader, report):
+        if not any(cell.strip() for cell in row):
+            continue
+        report.rows += 1
+        
+        try:
+            roll_number, subject_code, *values = [row[position].strip() for position in positions]
+        except IndexError:
+            report.add_error(line, 'Row has fewer columns than the header.')
+            continue
+        
+        student_id = student_ids.get(roll_number)
+        if student_id is None:
+            report.add_error(line, f'Unknown roll number "{roll_number}".')
+            continue
+        
+        subject_id = subject_ids.get(subject_code)
+        if subject_id is None:
+            report.add_error(line, f'Unknown subject code "{subject_code}".')
+            continue
+        
+        try:
+            values = [float(value) for value in values]
+        except ValueError:
+            report.add_error(line, 'Grades, attendance and study hours must be numbers.')
+            continue
+        
+        error = validate_performance(*values)
+        if error:
+            report.add_error(line, error)
+            continue
+        
+        actual_score = None
+        if actual_score_position is not None and actual_score_position < len(row) and row[actual_score_position].strip():
+            try:
+                actual_score = float(row[actual_score_position])
+            except ValueError:
+                report.add_error(line, 'Actual score must be a number.')
+                continue
+            if not 0 <= actual_score <= 100:
+                report.add_error(line, 'Actual score must be between 0 and 100.')
+                continue
+        
+        # A later row for the same student and subject replaces an earlier one
+        batch[(student_id, subject_id)] = (line, values, actual_score)
+        if len(batch) >= batch_size:
+            _write_batch(batch, predictor, report)
+            batch = {}
+    
+    if batch:
+        _write_batch(batch, predictor, report)
+    
+    return report
+
+
+def _numbered_rows(reader, report):
+    """``(line, row)`` for the data rows; stops with a file-level error where the file can't be read"""
+    line = 1
+    try:
+        for line, row in enumerate(reader, start=2):
+            yield line, row
+    except (UnicodeDecodeError, csv.Error) as e:
+        report.add_error(line + 1, _unreadable_file_message(e))
+
+
+def _unreadable_file_message(error):
+    if isinstance(error, UnicodeDecodeError):
+        return 'The file is not UTF-8 encoded text. Save it as a UTF-8 CSV file and try again.'
+    return f'The file is not valid CSV: {error}.'
+
+
+def _write_batch(batch, predictor, report):
+    """Score and upsert one chunk of validated rows"""
+    keys = list(batch)
+    predicted_scores = predictor.predict_batch([batch[key][1] for key in keys])
+    
+    student_ids = {student_id for student_id, _ in keys}
+    existing_performances = {
+        (student_id, subject_id): (performance_id, predicted_score)
+        for performance_id, student_id, subject_id, predicted_score in db.session.query(
+            StudentPerformance.id, StudentPerformance.student_id, StudentPerformance.subject_id,
+            StudentPerformance.predicted_score
+        ).filter(StudentPerformance.student_id.in_(student_ids))
+    }
+    students_with_data = {student_id for student_id, _ in existing_performances}
+    existing_enrollments = set(
+        db.session.query(StudentSubject.student_id, StudentSubject.subject_id)
+        .filter(StudentSubject.student_id.in_(student_ids))
+    )
+    
+    inserts, updates, enrollments = [], [], []
+    old_scores, new_scores = [], []
+    for key, predicted_score in zip(keys, predicted_scores):
+        _, (previous_grade, current_grade, attendance, study_hours), actual_score = batch[key]
+        values = {
+            'previous_grade': previous_grade,
+            'current_grade': current_grade,
+            'attendance_percentage': attendance,
+            'study_hours': study_hours,
+            'predicted_score': float(predicted_score),
+        }
+        if actual_score is not None:
+            values['actual_score'] = actual_score
+        existing = existing_performances.get(key)
+        if existing is None:
+            inserts.append(dict(values, student_id=key[0], subject_id=key[1]))
+            old_scores.append(None)
+        else:
+            updates.append(dict(values, id=existing[0]))
+            old_scores.append(existing[1])
+        new_scores.append(values['predicted_score'])
+        if key not in existing_enrollments:
+            enrollments.append({'student_id': key[0], 'subject_id': key[1]})
+    
+    try:
+        if inserts:
+            db.session.bulk_insert_mappings(StudentPerformance, inserts)
+        if updates:
+            db.session.bulk_update_mappings(StudentPerformance, updates)
+        if enrollments:
+            db.session.bulk_insert_mappings(StudentSubject, enrollments)
+        update_summary(performance_count=len(inserts),
+                       students_with_data=len(student_ids - students_with_data),
+                       **performance_deltas(old_scores, new_scores))
+        DataRevision.bump('performance', *(DataRevision.student_scope(student_id) for student_id in student_ids))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        # Keep going with the next chunk; report every row of the failed one
+        db.session.rollback()
+        for line, _, _ in batch.values():
+            report.add_error(line, f'Could not save row: {e.__class__.__name__}.')
+        return
+    
+    report.inserted += len(inserts)
+    report.updated += len(updates)
+    report.enrolled += len(enrollments)
@@ -0,0 +1,160 @@
+import json
+import os
+import time
+import numpy as np
+from sqlalchemy import bindparam, func, select
+from app import db
+from app.models.user import StudentPerformance, DataRevision
+from app.models.artifact_store import ARTIFACTS_DIR
+from app.models.ml_model import get_predictor, model_registry
+from app.services.summary import update_summary
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Kept beside the model artifacts it refers to, not in the working directory
+DEFAULT_CHECKPOINT_PATH = os.environ.get('RESCORE_CHECKPOINT', os.path.join(ARTIFACTS_DIR, 'rescore_checkpoint.json'))
+
+# Scores closer than this to the stored value are not rewritten
+SCORE_TOLERANCE = 1e-9
+
+
+class RescoreResult:
+    """Progress and score-delta statistics of a rescoring run"""
+    
+    def __init__(self, model_version, dry_run, resumed_from=0):
+        self.model_version = model_version
+        self.dry_run = dry_run
+        self.resumed_from = resumed_from
+        self.rows = 0
+        self.changed = 0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.seconds = 0.0
+    
+    def add_deltas(self, deltas):
+        abs_deltas = np.abs(deltas)
+        self.rows += len(deltas)
+        self.changed += int(np.count_nonzero(abs_deltas > SCORE_TOLERANCE))
+        self.sum_abs_delta += float(abs_deltas.sum())
+        if len(abs_deltas):
+            self.max_abs_delta = max(self.max_abs_delta, float(abs_deltas.max()))
+    
+    @property
+    def mean_abs_delta(self):
+        return self.sum_abs_delta / self.rows if self.rows else 0.0
+    
+    def to_dict(self):
+        return {
+            'model_version': self.model_version,
+            'dry_run': self.dry_run,
+            'resumed_from': self.resumed_from,
+            'rows': self.rows,
+            'changed': self.changed,
+            'mean_abs_delta': self.mean_abs_delta,
+            'max_abs_delta': self.max_abs_delta,
+            'seconds': self.seconds,
+        }
+
+
+def rescore_performances(chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, checkpoint_path=DEFAULT_CHECKPOINT_PATH,
+                         resume=True, progress=None):
+    """
+    Recompute ``predicted_score`` for every performance row with the current model
+    
+    Rows are read in primary-key order with keyset pagination (``id > last_id``),
+    each chunk is scored with one ``predict_batch`` call and only the scores that
+    changed are written back with a single executemany UPDATE per chunk. After
+    every committed chunk the last id is saved to ``checkpoint_path`` so a crashed
+    run picks up where it stopped (for the same model version). With ``dry_run``
+    nothing is written and the result only reports the score deltas.
+    
+    ``progress`` is called with ``(rows_done, rows_total)`` after each chunk.
+    """
+    predictor = get_predictor()
+    model_version = model_registry.version
+    
+    last_id = 0
+    if resume and not dry_run and checkpoint_path:
+        last_id = _read_checkpoint(checkpoint_path, model_version)
+    result = RescoreResult(model_version, dry_run, resumed_from=last_id)
+    
+    table = StudentPerformance.__table__
+    rows_total = db.session.execute(
+        select(func.count()).select_from(table).where(table.c.id > last_id)
+    ).scalar()
+    update_scores = (
+        table.update()
+        .where(table.c.id == bindparam('performance_id'))
+        .values(predicted_score=bindparam('score'))
+    )
+    
+    start = time.perf_counter()
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.previous_grade, table.c.current_grade,
+                   table.c.attendance_percentage, table.c.study_hours, table.c.predicted_score)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        
+        # NULLs become NaN in the float array
+        data = np.array(rows, dtype=np.float64)
+        ids = data[:, 0].astype(np.int64)
+        X = data[:, 1:5]
+        # Rows saved before current_grade existed are scored with the previous grade in its place
+        X[:, 1] = np.where(np.isnan(X[:, 1]), X[:, 0], X[:, 1])
+        old_scores = data[:, 5]
+        
+        new_scores = predictor.predict_batch(X)
+        deltas = np.where(np.isnan(old_scores), new_scores, new_scores - old_scores)
+        result.add_deltas(deltas)
+        
+        if not dry_run:
+            changed = np.flatnonzero(np.isnan(old_scores) | (np.abs(deltas) > SCORE_TOLERANCE))
+            if len(changed):
+                db.session.execute(update_scores, [
+                    {'performance_id': int(ids[i]), 'score': float(new_scores[i])} for i in changed
+                ])
+                update_summary(
+                    predicted_score_sum=float(new_scores[changed].sum() - np.nansum(old_scores[changed])),
+                    predicted_score_count=int(np.isnan(old_scores[changed]).sum()),
+                )
+                DataRevision.bump('predictions')
+            db.session.commit()
+            if checkpoint_path:
+                _write_checkpoint(checkpoint_path, model_version, int(ids[-1]))
+        
+        last_id = int(ids[-1])
+        if progress:
+            progress(result.rows, rows_total)
+    
+    result.seconds = time.perf_counter() - start
+    
+    # A finished run must not be "resumed" by the next one
+    if not dry_run and checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    
+    return result
+
+
+def _read_checkpoint(path, model_version):
+    """Last rescored id from an interrupted run with the same model, else 0"""
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    if checkpoint.get('model_version') != model_version:
+        return 0
+    return int(checkpoint.get('last_id', 0))
+
+
+def _write_checkpoint(path, model_version, last_id):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'model_version': model_version, 'last_id': last_id, 'updated_at': time.time()}, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,88 @@
+from sqlalchemy import func
+from app import db
+from app.models.user import StudentProfile, Subject, StudentPerformance, DashboardSummary
+
+SUMMARY_ID = 1
+
+
+def get_dashboard_summary():
+    """
+    The dashboard totals
+    
+    The row is created by the migration that adds the table and kept current by
+    every write. Should it be missing, the totals are computed for this request
+    only; read requests never write, so concurrent ones can't race to create it.
+    Run ``python rebuild_summary.py`` to store it again.
+    """
+    summary = db.session.get(DashboardSummary, SUMMARY_ID)
+    if summary is None:
+        summary = _compute_totals(DashboardSummary(id=SUMMARY_ID))
+    return summary
+
+
+def rebuild_summary():
+    """Recompute every total from scratch and commit the result"""
+    summary = db.session.get(DashboardSummary, SUMMARY_ID)
+    if summary is None:
+        summary = DashboardSummary(id=SUMMARY_ID)
+        db.session.add(summary)
+    _compute_totals(summary)
+    db.session.commit()
+    return summary
+
+
+def _compute_totals(summary):
+    """Fill ``summary`` with totals counted from the tables"""
+    predicted_score = StudentPerformance.predicted_score
+    performance_count, predicted_score_sum, predicted_score_count, students_with_data = db.session.query(
+        func.count(StudentPerformance.id),
+        func.coalesce(func.sum(predicted_score), 0.0),
+        func.count(predicted_score),
+        func.count(func.distinct(StudentPerformance.student_id)),
+    ).one()
+    
+    summary.subject_count = db.session.query(func.count(Subject.id)).scalar()
+    summary.student_count = db.session.query(func.count(StudentProfile.id)).scalar()
+    summary.performance_count = performance_count
+    summary.predicted_score_sum = float(predicted_score_sum)
+    summary.predicted_score_count = predicted_score_count
+    summary.students_with_data = students_with_data
+    return summary
+
+
+def update_summary(**deltas):
+    """
+    Add ``deltas`` to the summary columns as part of the current transaction
+    
+    The increment happens in SQL (``column = column + delta``) so concurrent writers
+    never lose updates. If the summary row is missing nothing is changed; the
+    dashboard then counts the totals from the tables, this write included.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = DashboardSummary.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == SUMMARY_ID)
+        .values({table.c[name]: table.c[name] + delta for name, delta in deltas.items()})
+    )
+
+
+def performance_deltas(old_scores, new_scores):
+    """
+    Summary deltas for replacing predicted scores
+    
+    ``old_scores`` holds the previous score of each affected row (None for rows that
+    did not exist or had no score); ``new_scores`` the new one (None for deleted rows).
+    """
+    predicted_score_sum = 0.0
+    predicted_score_count = 0
+    for old_score, new_score in zip(old_scores, new_scores):
+        if old_score is not None:
+            predicted_score_sum -= old_score
+            predicted_score_count -= 1
+        if new_score is not None:
+            predicted_score_sum += new_score
+            predicted_score_count += 1
+    return {'predicted_score_sum': predicted_score_sum, 'predicted_score_count': predicted_score_count}
@@ -0,0 +1,126 @@
+import numpy as np
+from sqlalchemy import select
+from app import db
+from app.models.ml_model import LEGACY_FEATURE_INDEX, StudentPerformancePredictor, generate_synthetic_data
+from app.models.user import StudentPerformance
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Synthetic rows mixed into every training run by default, as many as the initial model uses
+DEFAULT_SYNTHETIC_ROWS = 200
+
+# Columns that can serve as the training label
+LABELS = ['actual_score', 'current_grade']
+
+
+class TrainingSet:
+    """Feature matrix, labels and per-row weights assembled for one training run"""
+    
+    def __init__(self, X, y, sample_weight, real_rows, synthetic_rows, last_id):
+        self.X = X
+        self.y = y
+        self.sample_weight = sample_weight
+        self.real_rows = real_rows
+        self.synthetic_rows = synthetic_rows
+        self.last_id = last_id
+
+
+def iter_labelled_chunks(label='actual_score', chunk_size=DEFAULT_CHUNK_SIZE, after_id=0):
+    """
+    Stream labelled performance rows as ``(ids, X, y)`` arrays in primary-key order
+    
+    Rows are read from the table with keyset pagination (``id > last_id``) straight
+    into NumPy arrays, never as ORM objects, and rows without the label are skipped.
+    With ``actual_score`` as the label X has the four ``FEATURE_COLUMNS`` (a missing
+    current grade takes the previous grade's place, as when scoring); with
+    ``current_grade`` as the label X holds the three other features.
+    """
+    if label not in LABELS:
+        raise ValueError(f"Unknown label {label!r}; use one of {', '.join(LABELS)}.")
+    
+    table = StudentPerformance.__table__
+    label_column = table.c[label]
+    last_id = after_id
+    while True:
+        rows = db.session.execute(
+            select(table.c.id, table.c.previous_grade, table.c.current_grade,
+                   table.c.attendance_percentage, table.c.study_hours, label_column)
+            .where(table.c.id > last_id, label_column.is_not(None))
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        
+        data = np.array(rows, dtype=np.float64)
+        ids = data[:, 0].astype(np.int64)
+        X = data[:, 1:5]
+        if label == 'current_grade':
+            X = X[:, LEGACY_FEATURE_INDEX]
+        else:
+            X[:, 1] = np.where(np.isnan(X[:, 1]), X[:, 0], X[:, 1])
+        yield ids, X, data[:, 5]
+        
+        last_id = int(ids[-1])
+
+
+def build_training_set(label='actual_score', synthetic_rows=DEFAULT_SYNTHETIC_ROWS, synthetic_weight=1.0,
+                       chunk_size=DEFAULT_CHUNK_SIZE, after_id=0, random_state=42):
+    """
+    Labelled database rows plus ``synthetic_rows`` generated ones, weighted ``synthetic_weight`` each
+    
+    Real rows have weight 1, so a weight below 1 lets recorded outcomes dominate
+    while the synthetic rows still cover feature ranges the database lacks. Only
+    rows with an id above ``after_id`` are read.
+    """
+    last_id = after_id
+    X_chunks, y_chunks = [], []
+    for ids, X, y in iter_labelled_chunks(label, chunk_size, after_id):
+        last_id = int(ids[-1])
+        X_chunks.append(X)
+        y_chunks.append(y)
+    real_rows = sum(len(y) for y in y_chunks)
+    
+    if synthetic_rows:
+        X, y = generate_synthetic_data(synthetic_rows, random_state=random_state, as_frame=False)
+        if label == 'current_grade':
+            X, y = X[:, LEGACY_FEATURE_INDEX], X[:, 1]
+        X_chunks.append(X)
+        y_chunks.append(y)
+    
+    n_features = 3 if label == 'current_grade' else 4
+    X = np.concatenate(X_chunks) if X_chunks else np.empty((0, n_features))
+    y = np.concatenate(y_chunks) if y_chunks else np.empty(0)
+    
+    sample_weight = None
+    if synthetic_rows and real_rows and synthetic_weight != 1.0:
+        sample_weight = np.ones(len(y))
+        sample_weight[real_rows:] = synthetic_weight
+    
+    return TrainingSet(X, y, sample_weight, real_rows, synthetic_rows, last_id)
+
+
+def train_from_database(predictor=None, label='actual_score', synthetic_rows=DEFAULT_SYNTHETIC_ROWS,
+                        synthetic_weight=1.0, grow_trees=0, chunk_size=DEFAULT_CHUNK_SIZE, after_id=0,
+                        random_state=42):
+    """
+    Train the model on the recorded performance data and save it
+    
+    Refits the scaler and forest from scratch, or with ``grow_trees`` adds that many
+    trees fitted on the selected rows to the existing forest (pair it with
+    ``after_id`` to grow on rows recorded since the last run). Returns the test
+    metrics with the row counts and the last id read. Raises ``ValueError`` if
+    there is nothing to train on.
+    """
+    training_set = build_training_set(label, synthetic_rows, synthetic_weight, chunk_size, after_id, random_state)
+    if len(training_set.y) < 5:
+        raise ValueError('Not enough labelled rows to train on.')
+    
+    predictor = predictor or StudentPerformancePredictor()
+    if grow_trees:
+        metrics = predictor.grow(training_set.X, training_set.y, grow_trees, sample_weight=training_set.sample_weight)
+    else:
+        metrics = predictor.train(training_set.X, training_set.y, sample_weight=training_set.sample_weight)
+    
+    return dict(metrics, label=label, real_rows=training_set.real_rows,
+                synthetic_rows=training_set.synthetic_rows, last_id=training_set.last_id)
@@ -0,0 +1,86 @@
+import math
+import numpy as np
+from app.models.ml_model import FEATURE_COLUMNS
+from app.services.performance import validate_performance
+
+# Largest grid one request may score
+MAX_SCENARIOS = 5000
+
+# Features that can be swept, with their allowed (min, max)
+SWEEPABLE = {
+    'attendance_percentage': (0.0, 100.0),
+    'study_hours': (0.0, 168.0),
+}
+
+
+def sweep_values(name, spec, base_value):
+    """
+    Values of one swept feature from a ``{"start", "stop", "step"}`` spec (stop inclusive);
+    a missing spec keeps the feature at its base value
+    """
+    if spec is None:
+        return np.array([base_value])
+    try:
+        start, stop, step = float(spec['start']), float(spec['stop']), float(spec['step'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f'{name} needs numeric start, stop and step.')
+    if not all(math.isfinite(value) for value in (start, stop, step)):
+        raise ValueError(f'{name} start, stop and step must be finite numbers.')
+    
+    low, high = SWEEPABLE[name]
+    if step <= 0:
+        raise ValueError(f'{name} step must be positive.')
+    if start > stop:
+        raise ValueError(f'{name} start must not exceed stop.')
+    if start < low or stop > high:
+        raise ValueError(f'{name} must stay between {low:g} and {high:g}.')
+    
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if count > MAX_SCENARIOS:
+        raise ValueError(f'Too many scenarios; at most {MAX_SCENARIOS} are allowed.')
+    return start + step * np.arange(count)
+
+
+def what_if_grid(base, sweeps, predictor, max_scenarios=MAX_SCENARIOS):
+    """
+    Predicted scores over a grid of attendance and study hours around a base record
+    
+    ``base`` maps every name in ``FEATURE_COLUMNS`` to a number and ``sweeps`` maps
+    swept features to range specs. The base record and the whole grid are scored in
+    one ``predict_batch`` call. Raises ``ValueError`` with a user-facing message for
+    invalid input.
+    """
+    try:
+        values = [float(base[name]) for name in FEATURE_COLUMNS]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"base needs numeric {', '.join(FEATURE_COLUMNS)}.")
+    error = validate_performance(*values)
+    if error:
+        raise ValueError(error)
+    
+    if not isinstance(sweeps, dict):
+        raise ValueError('sweeps must be an object of range specs.')
+    unknown = set(sweeps) - set(SWEEPABLE)
+    if unknown:
+        raise ValueError(f"Only {' and '.join(SWEEPABLE)} can be swept.")
+    
+    attendance = sweep_values('attendance_percentage', sweeps.get('attendance_percentage'), values[2])
+    study_hours = sweep_values('study_hours', sweeps.get('study_hours'), values[3])
+    if len(attendance) * len(study_hours) > max_scenarios:
+        raise ValueError(f'Too many scenarios; at most {max_scenarios} are allowed.')
+    
+    # Row 0 is the base record, followed by the grid in attendance-major order
+    X = np.empty((1 + len(attendance) * len(study_hours), len(FEATURE_COLUMNS)))
+    X[:] = values
+    X[1:, 2] = np.repeat(attendance, len(study_hours))
+    X[1:, 3] = np.tile(study_hours, len(attendance))
+    scores = predictor.predict_batch(X)
+    
+    return {
+        'base': dict(zip(FEATURE_COLUMNS, values)),
+        'base_score': round(float(scores[0]), 2),
+        'attendance_percentage': attendance.round(4).tolist(),
+        'study_hours': study_hours.round(4).tolist(),
+        # scores[i][j] is the prediction for attendance_percentage[i] and study_hours[j]
+        'scores': scores[1:].reshape(len(attendance), len(study_hours)).round(2).tolist(),
+    }
@@ -0,0 +1,8 @@
+"""
+Benchmark suite for the request paths and the prediction model
+
+Run from the project root with::
+    
+    python -m benchmarks run --sizes 100 1000 --output baseline.json
+    python -m benchmarks compare baseline.json current.json
+"""
@@ -0,0 +1,48 @@
+import argparse
+import json
+import os
+import sys
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.runner import compare_reports, run_benchmarks
+
+parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark routes and the prediction model.')
+subparsers = parser.add_subparsers(dest='command', required=True)
+
+run = subparsers.add_parser('run', help='seed temporary databases and benchmark every route and the model')
+run.add_argument('--sizes', type=int, nargs='+', default=[100, 1000], help='numbers of seeded students (default: 100 1000)')
+run.add_argument('--subjects', type=int, default=20, help='subjects per database (default: 20)')
+run.add_argument('--per-student', type=int, default=5, help='enrollments and performance rows per student (default: 5)')
+run.add_argument('--faculty', type=int, default=5, help='faculty users per database (default: 5)')
+run.add_argument('--model-rows', type=int, nargs='+', default=[1000, 10000], help='synthetic rows for the model benchmarks')
+run.add_argument('--iterations', type=int, default=20, help='timed calls per benchmark (default: 20)')
+run.add_argument('--train-iterations', type=int, default=3, help='timed training runs per size (default: 3)')
+run.add_argument('--output', default='benchmark_results.json', help='where to write the JSON report')
+
+compare = subparsers.add_parser('compare', help='compare two reports and flag regressions')
+compare.add_argument('baseline')
+compare.add_argument('current')
+compare.add_argument('--threshold', type=float, default=1.25, help='p50 ratio counted as a regression (default: 1.25)')
+args = parser.parse_args()
+
+if args.command == 'run':
+    report = run_benchmarks(args.sizes, args.model_rows, iterations=args.iterations,
+                            train_iterations=args.train_iterations, subjects=args.subjects,
+                            per_student=args.per_student, faculty=args.faculty)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+else:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    
+    regressions = 0
+    for label, old, new, ratio, regressed in compare_reports(baseline, current, args.threshold):
+        print(f"{'SLOWER' if regressed else 'ok    '} {label}: {old:.2f} ms -> {new:.2f} ms ({ratio:.2f}x)")
+        regressions += regressed
+    sys.exit(1 if regressions else 0)
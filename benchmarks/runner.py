@@ -0,0 +1,347 @@
+"""
+Route and model benchmarks
+
+Each data size gets its own temporary SQLite database, seeded by ``seed_database``.
+Every GET route of the app's blueprints (plus the form posts in ``POST_SCENARIOS``)
+is then driven through the Flask test client, and the predictor's ``predict``,
+``predict_batch``, ``train`` and ``generate_synthetic_data`` are timed on synthetic
+data. Results are plain dicts, written as JSON by ``python -m benchmarks run``.
+"""
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+from flask import url_for
+from sqlalchemy import event
+from app import create_app, db
+from app.models.artifact_store import ArtifactStore
+from app.models.ml_model import FEATURE_COLUMNS, StudentPerformancePredictor, generate_synthetic_data, model_registry
+from app.services.charts import ANALYTICS_CHARTS, chart_cache
+from benchmarks.seed import PASSWORD, RESET_TOKEN, seed_database
+from migrations import upgrade
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ROUTE_BLUEPRINTS = ('auth', 'student', 'faculty', 'api')
+
+# Values for URL parameters, from the seeded fixture
+ROUTE_ARGUMENTS = {
+    'student_id': lambda fixture: fixture['student_id'],
+    'subject_id': lambda fixture: fixture['subject_id'],
+    'user_id': lambda fixture: fixture['student_user_id'],
+    'token': lambda fixture: RESET_TOKEN,
+    'name': lambda fixture: ANALYTICS_CHARTS[0][0],
+}
+
+# Form posts benchmarked besides the GET routes: endpoint -> (client, form data)
+POST_SCENARIOS = {
+    'auth.login': ('fresh', lambda fixture: dict(email='student1@bench.local', password=PASSWORD)),
+    'student.add_performance': ('student', lambda fixture: dict(
+        subject_id=fixture['subject_id'], previous_grade=72, current_grade=81, attendance=88, study_hours=9,
+    )),
+}
+
+PERCENTILES = (50, 90, 99)
+
+
+class QueryCounter:
+    """Counts statements executed on an engine"""
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+    
+    def _on_execute(self, *args):
+        self.count += 1
+    
+    def close(self):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def measure(prepare, iterations, counter=None):
+    """
+    Time ``iterations`` calls of the callable returned by ``prepare()``
+    
+    ``prepare`` runs outside the timed region (e.g. to build a fresh client). One
+    untimed warm-up call comes first, and one extra call runs under tracemalloc to
+    record peak Python memory without skewing the latencies.
+    """
+    result = prepare()()
+    timings, queries = [], []
+    for _ in range(iterations):
+        call = prepare()
+        if counter:
+            counter.count = 0
+        start = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - start)
+        if counter:
+            queries.append(counter.count)
+    
+    call = prepare()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    timings_ms = np.array(timings) * 1000
+    stats = {'iterations': iterations, 'mean_ms': round(float(timings_ms.mean()), 3)}
+    for percentile in PERCENTILES:
+        stats[f'p{percentile}_ms'] = round(float(np.percentile(timings_ms, percentile)), 3)
+    stats['max_ms'] = round(float(timings_ms.max()), 3)
+    stats['peak_memory_kb'] = round(peak / 1024, 1)
+    if counter:
+        stats['queries'] = int(max(queries))
+        stats['queries_mean'] = round(float(np.mean(queries)), 2)
+    return stats, result
+
+
+def run_route_benchmarks(students, iterations=20, subjects=20, per_student=5, faculty=5):
+    """Seed a fresh database with ``students`` students and benchmark every route against it"""
+    workdir = tempfile.mkdtemp(prefix='benchmark-')
+    previous_url = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    # Routes that predict load (and may train or promote) the model; publish it in
+    # the scratch directory so the shipped artifacts stay untouched
+    previous_store = model_registry.store
+    model_registry.store = ArtifactStore(os.path.join(workdir, 'artifacts'))
+    model_registry.invalidate()
+    try:
+        app = create_app()
+        app.config['SQL_LOG_REQUESTS'] = False
+        with app.app_context():
+            upgrade(db.engine)
+            start = time.perf_counter()
+            fixture = seed_database(students=students, subjects=subjects, per_student=per_student, faculty=faculty)
+            seed_seconds = time.perf_counter() - start
+            engine = db.engine
+        chart_cache.clear()
+        
+        # Requests run without an outer app context, so each gets its own session
+        counter = QueryCounter(engine)
+        try:
+            results = _benchmark_routes(app, fixture, iterations, counter)
+        finally:
+            counter.close()
+        engine.dispose()
+    finally:
+        if previous_url is None:
+            os.environ.pop('DATABASE_URL', None)
+        else:
+            os.environ['DATABASE_URL'] = previous_url
+        model_registry.store = previous_store
+        model_registry.invalidate()
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {
+        'students': students,
+        'fixture': {key: fixture[key] for key in ('users', 'subjects', 'enrollments', 'performances')},
+        'seed_seconds': round(seed_seconds, 3),
+        'results': results,
+    }
+
+
+def _benchmark_routes(app, fixture, iterations, counter):
+    clients = {
+        'anonymous': app.test_client(),
+        'student': _client(app, fixture['student_user_id']),
+        'faculty': _client(app, fixture['faculty_user_id']),
+    }
+    adapter = app.url_map.bind('localhost')
+    
+    scenarios = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        blueprint = rule.endpoint.split('.')[0]
+        if blueprint not in ROUTE_BLUEPRINTS or 'GET' not in rule.methods:
+            continue
+        scenarios.append(('GET', rule, _route_role(rule.endpoint), None))
+        if rule.endpoint in POST_SCENARIOS:
+            role, data = POST_SCENARIOS[rule.endpoint]
+            scenarios.append(('POST', rule, role, data(fixture)))
+    
+    results = {}
+    for method, rule, role, data in scenarios:
+        key = f'{method} {rule.endpoint}'
+        if any(argument not in ROUTE_ARGUMENTS for argument in rule.arguments):
+            results[key] = {'path': rule.rule, 'skipped': 'no fixture value for a URL parameter'}
+            continue
+        with app.test_request_context():
+            path = url_for(rule.endpoint, **{argument: ROUTE_ARGUMENTS[argument](fixture) for argument in rule.arguments})
+        
+        # Blueprints without a url_prefix can register the same path twice
+        endpoint, _ = adapter.match(path, method=method)
+        if endpoint != rule.endpoint:
+            results[key] = {'path': path, 'skipped': f'shadowed by {endpoint}'}
+            print(f"  {key:<40} skipped (shadowed by {endpoint})")
+            continue
+        
+        def prepare(role=role, method=method, path=path, data=data):
+            if role == 'fresh':
+                client = app.test_client()
+            elif role == 'fresh_student':
+                client = _client(app, fixture['student_user_id'])
+            else:
+                client = clients[role]
+            return lambda: client.open(path, method=method, data=data)
+        
+        stats, response = measure(prepare, iterations, counter)
+        results[key] = dict(path=path, status=response.status_code, **stats)
+        print(f"  {key:<40} {response.status_code}  p50 {stats['p50_ms']:8.2f} ms  "
+              f"p99 {stats['p99_ms']:8.2f} ms  {stats['queries']:3d} queries  {stats['peak_memory_kb']:9.1f} KiB")
+    return results
+
+
+def _route_role(endpoint):
+    """Which client drives a GET route"""
+    if endpoint == 'auth.logout':
+        return 'fresh_student'
+    if endpoint.startswith('auth.'):
+        return 'anonymous'
+    if endpoint.startswith('student.'):
+        return 'student'
+    return 'faculty'
+
+
+def _client(app, user_id):
+    """A test client logged in as ``user_id`` through the session, skipping password hashing"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+def run_model_benchmarks(rows, iterations=20, train_iterations=3):
+    """
+    Benchmark data generation, training and prediction on ``rows`` synthetic records
+    
+    Loading and prediction are timed for the pickled forest and for its compact
+    export side by side, along with file sizes, the resident memory a fresh process
+    gains by loading each, and the largest difference between their predictions.
+    """
+    workdir = tempfile.mkdtemp(prefix='benchmark-')
+    try:
+        # Train into a scratch directory so the shipped artifacts stay untouched
+        paths = {
+            'model_path': os.path.join(workdir, 'performance_model.pkl'),
+            'scaler_path': os.path.join(workdir, 'performance_scaler.pkl'),
+            'forest_path': os.path.join(workdir, 'performance_forest.npz'),
+        }
+        # Pointing forest_path at a missing file makes the predictor load the pickles
+        pickle_paths = dict(paths, forest_path=os.path.join(workdir, 'missing.npz'))
+        predictor = StudentPerformancePredictor(**paths)
+        
+        results = {}
+        results['generate_synthetic_data'], data = measure(lambda: lambda: generate_synthetic_data(rows), iterations)
+        features, y = data[FEATURE_COLUMNS].to_numpy(), data['actual_score'].to_numpy()
+        results['train'], _ = measure(lambda: lambda: predictor.train(features, y), train_iterations)
+        
+        # train() saved both formats; time loading each from disk
+        results['load_pickle'], pickled = measure(lambda: lambda: StudentPerformancePredictor(**pickle_paths), iterations)
+        results['load_compact'], compact = measure(lambda: lambda: StudentPerformancePredictor(**paths), iterations)
+        
+        for suffix, loaded in (('', pickled), ('_compact', compact)):
+            results[f'predict{suffix}'], _ = measure(lambda: lambda: loaded.predict(features[0]), iterations)
+            results[f'predict_batch{suffix}'], _ = measure(lambda: lambda: loaded.predict_batch(features), iterations)
+        
+        formats = {
+            'pickle_bytes': os.path.getsize(paths['model_path']) + os.path.getsize(paths['scaler_path']),
+            'compact_bytes': os.path.getsize(paths['forest_path']),
+            'pickle_rss_mb': _load_rss_mb(pickle_paths),
+            'compact_rss_mb': _load_rss_mb(paths),
+            # Compared on the compact forest itself; large batches are otherwise served by the pickles
+            'max_abs_diff': float(np.abs(compact.model.predict(compact.scaler.transform(features))
+                                         - pickled.predict_batch(features)).max()),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    for name, stats in results.items():
+        print(f"  {name:<40} p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms  {stats['peak_memory_kb']:9.1f} KiB")
+    print(f"  {'formats':<40} {formats}")
+    return {'rows': rows, 'results': results, 'formats': formats}
+
+
+# Runs in a fresh interpreter: resident memory gained by loading a predictor and scoring one row
+RSS_PROBE = """
+import os, sys
+from app.models.ml_model import StudentPerformancePredictor
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+before = rss()
+predictor = StudentPerformancePredictor(*sys.argv[1:4])
+predictor.predict([70, 75, 90, 10])
+print(rss() - before)
+"""
+
+
+def _load_rss_mb(paths):
+    """RSS growth of a fresh process loading the predictor from ``paths`` (None where /proc is unavailable)"""
+    if not os.path.exists('/proc/self/statm'):
+        return None
+    result = subprocess.run(
+        [sys.executable, '-c', RSS_PROBE, paths['model_path'], paths['scaler_path'], paths['forest_path']],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    return round(int(result.stdout.strip().splitlines()[-1]) / 2**20, 1)
+
+
+def run_benchmarks(sizes, model_rows, iterations=20, train_iterations=3, subjects=20, per_student=5, faculty=5):
+    """Run the whole suite and return the JSON-serializable report"""
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'iterations': iterations,
+            'train_iterations': train_iterations,
+            'subjects': subjects,
+            'per_student': per_student,
+            'faculty': faculty,
+        },
+        'routes': [],
+        'model': [],
+    }
+    for students in sizes:
+        print(f"Routes with {students} students")
+        report['routes'].append(run_route_benchmarks(students, iterations, subjects, per_student, faculty))
+    for rows in model_rows:
+        print(f"Model with {rows} rows")
+        report['model'].append(run_model_benchmarks(rows, iterations, train_iterations))
+    return report
+
+
+def compare_reports(baseline, current, threshold=1.25):
+    """
+    Differences between two reports, matched by data size and benchmark name
+    
+    Returns ``(label, baseline p50, current p50, ratio, regressed)`` tuples; a
+    benchmark regresses when its p50 grows by more than ``threshold`` times or,
+    for routes, when it issues more queries than before.
+    """
+    rows = []
+    sections = [('routes', 'students'), ('model', 'rows')]
+    for section, size_key in sections:
+        previous_runs = {run[size_key]: run['results'] for run in baseline.get(section, [])}
+        for run in current.get(section, []):
+            previous = previous_runs.get(run[size_key])
+            if previous is None:
+                continue
+            for name, stats in run['results'].items():
+                old = previous.get(name)
+                if not old or 'p50_ms' not in old or 'p50_ms' not in stats:
+                    continue
+                ratio = stats['p50_ms'] / old['p50_ms'] if old['p50_ms'] else float('inf')
+                regressed = ratio > threshold or stats.get('queries', 0) > old.get('queries', 0)
+                rows.append((f"{section} {size_key}={run[size_key]} {name}", old['p50_ms'], stats['p50_ms'], ratio, regressed))
+    return rows
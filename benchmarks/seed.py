@@ -0,0 +1,96 @@
+"""
+Synthetic fixture seeder for the benchmark suite
+
+Fills an empty, migrated database with users, profiles, subjects, enrollments and
+performance rows through bulk inserts, so large fixtures seed in seconds.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models.ml_model import generate_synthetic_data, heuristic_scores
+from app.models.user import User, StudentProfile, FacultyProfile, Subject, StudentSubject, StudentPerformance
+from app.services.summary import rebuild_summary
+
+PASSWORD = 'benchmark'
+RESET_TOKEN = 'benchmark-reset-token'
+INSERT_CHUNK_SIZE = 10_000
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Meera', 'Kabir', 'Ananya', 'Rohan', 'Saanvi', 'Vivaan', 'Priya']
+
+
+def seed_database(students=1000, subjects=20, per_student=5, faculty=5, random_state=42):
+    """
+    Bulk insert a synthetic fixture and return the ids the route benchmarks need
+    
+    Every student is enrolled in ``per_student`` distinct subjects and has one
+    performance row per enrollment, scored with the rule-based heuristic. All
+    users share ``PASSWORD``; the first student user holds a valid ``RESET_TOKEN``.
+    """
+    per_student = min(per_student, subjects)
+    rng = np.random.RandomState(random_state)
+    password_hash = generate_password_hash(PASSWORD)
+    
+    # Faculty users come first, so user ids 1..faculty are faculty
+    users = [
+        dict(id=i, email=f'faculty{i}@bench.local', username=f'faculty{i}', password_hash=password_hash, role='faculty')
+        for i in range(1, faculty + 1)
+    ] + [
+        dict(id=faculty + i, email=f'student{i}@bench.local', username=f'student{i}', password_hash=password_hash, role='student')
+        for i in range(1, students + 1)
+    ]
+    if students:
+        users[faculty].update(reset_token=RESET_TOKEN, reset_token_expiry=datetime.now() + timedelta(days=1))
+    _bulk_insert(User, users)
+    
+    _bulk_insert(FacultyProfile, [
+        dict(id=i, user_id=i, first_name=FIRST_NAMES[i % len(FIRST_NAMES)], last_name=f'Faculty{i:04d}', department='CS')
+        for i in range(1, faculty + 1)
+    ])
+    _bulk_insert(StudentProfile, [
+        dict(id=i, user_id=faculty + i, first_name=FIRST_NAMES[i % len(FIRST_NAMES)],
+             last_name=f'Student{i:07d}', roll_number=f'R{i:07d}')
+        for i in range(1, students + 1)
+    ])
+    _bulk_insert(Subject, [
+        dict(id=i, name=f'Subject {i:04d}', code=f'S{i:04d}')
+        for i in range(1, subjects + 1)
+    ])
+    
+    # Distinct subjects per student: the first columns of a random permutation of each row
+    chosen = np.argsort(rng.random_sample((students, subjects)), axis=1)[:, :per_student] + 1
+    student_ids = np.repeat(np.arange(1, students + 1), per_student)
+    subject_ids = chosen.ravel()
+    _bulk_insert(StudentSubject, [
+        dict(student_id=int(student_id), subject_id=int(subject_id))
+        for student_id, subject_id in zip(student_ids, subject_ids)
+    ])
+    
+    X, _ = generate_synthetic_data(len(student_ids), random_state=rng, as_frame=False)
+    scores = np.clip(heuristic_scores(X[:, 0], X[:, 1], X[:, 2], X[:, 3]), 0, 100)
+    _bulk_insert(StudentPerformance, [
+        dict(student_id=int(student_id), subject_id=int(subject_id), previous_grade=float(row[0]),
+             current_grade=float(row[1]), attendance_percentage=float(row[2]), study_hours=float(row[3]),
+             predicted_score=float(score))
+        for student_id, subject_id, row, score in zip(student_ids, subject_ids, X, scores)
+    ])
+    
+    rebuild_summary()
+    return {
+        'users': len(users),
+        'students': students,
+        'faculty': faculty,
+        'subjects': subjects,
+        'enrollments': len(student_ids),
+        'performances': len(student_ids),
+        'faculty_user_id': 1 if faculty else None,
+        'student_user_id': faculty + 1 if students else None,
+        'student_id': 1 if students else None,
+        'subject_id': int(subject_ids[0]) if len(subject_ids) else None,
+    }
+
+
+def _bulk_insert(model, rows):
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.bulk_insert_mappings(model, rows[start:start + INSERT_CHUNK_SIZE])
+    db.session.commit()
@@ -0,0 +1,30 @@
+import argparse
+import json
+import sys
+from app import create_app
+from app.services.performance_import import DEFAULT_BATCH_SIZE, import_performance_csv
+
+parser = argparse.ArgumentParser(description='Bulk import student performance records from CSV files.')
+parser.add_argument('files', nargs='+', help='CSV files with a header row')
+parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                    help='rows scored and written per chunk (default: %(default)s)')
+parser.add_argument('--report', help='write the per-file error reports to this JSON file')
+args = parser.parse_args()
+
+app = create_app()
+reports = []
+with app.app_context():
+    for path in args.files:
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            report = import_performance_csv(stream, filename=path, batch_size=args.batch_size)
+        reports.append(report.to_dict())
+        print(f"{path}: {report.rows} rows, {report.inserted} added, {report.updated} updated, "
+              f"{report.enrolled} enrolled, {report.error_count} errors")
+        for line, message in report.errors[:20]:
+            print(f"  line {line}: {message}")
+
+if args.report:
+    with open(args.report, 'w') as f:
+        json.dump(reports, f, indent=2)
+
+sys.exit(1 if any(report['error_count'] for report in reports) else 0)
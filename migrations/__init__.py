@@ -0,0 +1,87 @@
+"""
+Versioned schema migrations
+
+Each module in ``migrations/versions`` is named ``<number>_<description>.py`` and
+defines ``upgrade(conn)``, which receives a SQLAlchemy connection inside a
+transaction. Applied versions are recorded in the ``schema_version`` table, so
+``upgrade()`` only runs what is pending. Run from the project root with::
+    
+    python -m migrations upgrade    # apply pending migrations
+    python -m migrations current    # show applied and pending versions
+    python -m migrations check      # EXPLAIN the hot lookups and verify they use an index
+"""
+import importlib
+import os
+import re
+from datetime import datetime
+import sqlalchemy as sa
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), 'versions')
+
+_metadata = sa.MetaData()
+schema_version = sa.Table(
+    'schema_version', _metadata,
+    sa.Column('version', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(100), nullable=False),
+    sa.Column('applied_at', sa.DateTime, nullable=False),
+)
+
+
+def available_migrations():
+    """(version, name, module) for every migration file, in version order"""
+    migrations = []
+    for filename in os.listdir(VERSIONS_DIR):
+        match = re.match(r'^(\d+)_(\w+)\.py$', filename)
+        if match:
+            module = importlib.import_module(f'migrations.versions.{filename[:-3]}')
+            migrations.append((int(match.group(1)), match.group(2), module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def applied_versions(engine):
+    _metadata.create_all(engine, tables=[schema_version])
+    with engine.connect() as conn:
+        return {row.version for row in conn.execute(sa.select(schema_version.c.version))}
+
+
+def upgrade(engine, target=None):
+    """Apply every pending migration up to ``target`` (default: latest), each in its own transaction"""
+    applied = applied_versions(engine)
+    pending = [m for m in available_migrations() if m[0] not in applied and (target is None or m[0] <= target)]
+    for version, name, module in pending:
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(schema_version.insert().values(version=version, name=name, applied_at=datetime.now()))
+        print(f"Applied migration {version:04d}_{name}")
+    return [version for version, _, _ in pending]
+
+
+# Lookups on hot request paths, with the index each one must use
+HOT_QUERIES = [
+    ('ix_student_performance_student_subject',
+     'SELECT id FROM student_performance WHERE student_id = 1 AND subject_id = 1'),
+    ('ix_student_subject_student_subject',
+     'SELECT id FROM student_subject WHERE student_id = 1 AND subject_id = 1'),
+    ('ix_student_profile_user_id', 'SELECT id FROM student_profile WHERE user_id = 1'),
+    ('ix_faculty_profile_user_id', 'SELECT id FROM faculty_profile WHERE user_id = 1'),
+    ('ix_user_reset_token', "SELECT id FROM \"user\" WHERE reset_token = 'token'"),
+    ('ix_student_profile_last_name',
+     "SELECT id FROM student_profile WHERE (last_name, id) > ('M', 1) ORDER BY last_name, id LIMIT 26"),
+    ('ix_subject_name', "SELECT id FROM subject WHERE (name, id) > ('M', 1) ORDER BY name, id LIMIT 26"),
+    ('ix_student_subject_subject_id', 'SELECT COUNT(*) FROM student_subject WHERE subject_id = 1'),
+]
+
+
+def check_indexes(engine):
+    """
+    EXPLAIN every hot query and report whether its plan uses the expected index
+    
+    Returns a list of (index name, uses index, plan text).
+    """
+    explain = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    results = []
+    with engine.connect() as conn:
+        for index_name, query in HOT_QUERIES:
+            plan = '\n'.join(' '.join(str(value) for value in row) for row in conn.execute(sa.text(explain + query)))
+            results.append((index_name, index_name in plan, plan))
+    return results
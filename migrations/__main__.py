@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from migrations import applied_versions, available_migrations, check_indexes, upgrade
+
+parser = argparse.ArgumentParser(prog='python -m migrations', description='Manage the database schema.')
+parser.add_argument('command', choices=['upgrade', 'current', 'check'], nargs='?', default='upgrade')
+parser.add_argument('--target', type=int, help='upgrade only up to this version')
+args = parser.parse_args()
+
+app = create_app()
+with app.app_context():
+    if args.command == 'upgrade':
+        if not upgrade(db.engine, target=args.target):
+            print("Database schema is up to date")
+    
+    elif args.command == 'current':
+        applied = applied_versions(db.engine)
+        for version, name, _ in available_migrations():
+            status = 'applied' if version in applied else 'pending'
+            print(f"{version:04d}_{name}: {status}")
+    
+    else:
+        failures = 0
+        for index_name, uses_index, plan in check_indexes(db.engine):
+            print(f"{'OK  ' if uses_index else 'FAIL'} {index_name}: {plan}")
+            failures += not uses_index
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,63 @@
+import sqlalchemy as sa
+
+# The tables as the app first created them; later columns and indexes come from later migrations
+metadata = sa.MetaData()
+
+sa.Table(
+    'user', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('email', sa.String(120), unique=True, nullable=False),
+    sa.Column('username', sa.String(80), unique=True, nullable=False),
+    sa.Column('password_hash', sa.String(128)),
+    sa.Column('role', sa.String(20), nullable=False),
+    sa.Column('reset_token', sa.String(100), nullable=True),
+    sa.Column('reset_token_expiry', sa.DateTime, nullable=True),
+)
+
+sa.Table(
+    'student_profile', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('first_name', sa.String(50), nullable=False),
+    sa.Column('last_name', sa.String(50), nullable=False),
+    sa.Column('roll_number', sa.String(20), unique=True, nullable=False),
+)
+
+sa.Table(
+    'faculty_profile', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('user_id', sa.Integer, sa.ForeignKey('user.id'), nullable=False),
+    sa.Column('first_name', sa.String(50), nullable=False),
+    sa.Column('last_name', sa.String(50), nullable=False),
+    sa.Column('department', sa.String(50), nullable=False),
+)
+
+sa.Table(
+    'subject', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('name', sa.String(100), nullable=False),
+    sa.Column('code', sa.String(20), unique=True, nullable=False),
+)
+
+sa.Table(
+    'student_subject', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('student_id', sa.Integer, sa.ForeignKey('student_profile.id'), nullable=False),
+    sa.Column('subject_id', sa.Integer, sa.ForeignKey('subject.id'), nullable=False),
+)
+
+sa.Table(
+    'student_performance', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('student_id', sa.Integer, sa.ForeignKey('student_profile.id'), nullable=False),
+    sa.Column('subject_id', sa.Integer, sa.ForeignKey('subject.id'), nullable=False),
+    sa.Column('previous_grade', sa.Float, nullable=False),
+    sa.Column('attendance_percentage', sa.Float, nullable=False),
+    sa.Column('study_hours', sa.Float, nullable=False),
+    sa.Column('predicted_score', sa.Float, nullable=True),
+)
+
+
+def upgrade(conn):
+    """Create the original tables (a no-op for databases created by db.create_all())"""
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,11 @@
+import sqlalchemy as sa
+
+
+def upgrade(conn):
+    """Add current_grade column to student_performance table"""
+    # Check if the column already exists
+    columns = [col['name'] for col in sa.inspect(conn).get_columns('student_performance')]
+    
+    # Only add the column if it doesn't exist
+    if 'current_grade' not in columns:
+        conn.execute(sa.text('ALTER TABLE student_performance ADD COLUMN current_grade FLOAT'))
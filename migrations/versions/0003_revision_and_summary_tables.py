@@ -0,0 +1,42 @@
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'data_revision', metadata,
+    sa.Column('scope', sa.String(40), primary_key=True),
+    sa.Column('revision', sa.Integer, nullable=False),
+)
+
+sa.Table(
+    'dashboard_summary', metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('subject_count', sa.Integer, nullable=False),
+    sa.Column('student_count', sa.Integer, nullable=False),
+    sa.Column('performance_count', sa.Integer, nullable=False),
+    sa.Column('predicted_score_sum', sa.Float, nullable=False),
+    sa.Column('predicted_score_count', sa.Integer, nullable=False),
+    sa.Column('students_with_data', sa.Integer, nullable=False),
+)
+
+# The dashboard totals, counted from the tables as they are at this version
+SEED_SUMMARY = """
+INSERT INTO dashboard_summary (id, subject_count, student_count, performance_count,
+                               predicted_score_sum, predicted_score_count, students_with_data)
+SELECT 1,
+       (SELECT COUNT(*) FROM subject),
+       (SELECT COUNT(*) FROM student_profile),
+       COUNT(id),
+       COALESCE(SUM(predicted_score), 0.0),
+       COUNT(predicted_score),
+       COUNT(DISTINCT student_id)
+FROM student_performance
+"""
+
+
+def upgrade(conn):
+    """Create the chart revision counters and the faculty dashboard summary"""
+    metadata.create_all(conn, checkfirst=True)
+    # Created here, so reads never have to insert it
+    if conn.execute(sa.text('SELECT COUNT(*) FROM dashboard_summary')).scalar() == 0:
+        conn.execute(sa.text(SEED_SUMMARY))
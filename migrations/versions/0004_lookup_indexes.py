@@ -0,0 +1,59 @@
+import sqlalchemy as sa
+
+# (index name, table, columns, unique)
+INDEXES = [
+    ('ix_student_performance_student_subject', 'student_performance', ['student_id', 'subject_id'], True),
+    ('ix_student_subject_student_subject', 'student_subject', ['student_id', 'subject_id'], True),
+    ('ix_student_profile_user_id', 'student_profile', ['user_id'], True),
+    ('ix_faculty_profile_user_id', 'faculty_profile', ['user_id'], True),
+    ('ix_user_reset_token', 'user', ['reset_token'], False),
+]
+
+# The dashboard totals, counted from the tables as they are at this version
+SEED_SUMMARY = """
+INSERT INTO dashboard_summary (id, subject_count, student_count, performance_count,
+                               predicted_score_sum, predicted_score_count, students_with_data)
+SELECT 1,
+       (SELECT COUNT(*) FROM subject),
+       (SELECT COUNT(*) FROM student_profile),
+       COUNT(id),
+       COALESCE(SUM(predicted_score), 0.0),
+       COUNT(predicted_score),
+       COUNT(DISTINCT student_id)
+FROM student_performance
+"""
+
+
+def upgrade(conn):
+    """Index the per-request lookup columns"""
+    # The app always updated the first row it found, so drop later duplicates
+    # before the (student, subject) pairs become unique
+    deleted = 0
+    for table in ('student_performance', 'student_subject'):
+        count = conn.execute(sa.text(
+            f'DELETE FROM {table} WHERE id NOT IN '
+            f'(SELECT MIN(id) FROM {table} GROUP BY student_id, subject_id)'
+        )).rowcount
+        if count:
+            print(f"Removed {count} duplicate (student, subject) row(s) from {table}, keeping the oldest of each")
+        deleted += count
+    if deleted:
+        # Recount the dashboard totals without the deleted rows
+        conn.execute(sa.text('DELETE FROM dashboard_summary'))
+        conn.execute(sa.text(SEED_SUMMARY))
+    
+    # Duplicate profiles own other data, so refuse to guess which one to keep
+    for table in ('student_profile', 'faculty_profile'):
+        duplicates = conn.execute(sa.text(
+            f'SELECT user_id FROM {table} GROUP BY user_id HAVING COUNT(*) > 1'
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(f'{table} has several profiles for user ids {duplicates}; '
+                               f'merge them before running this migration')
+    
+    inspector = sa.inspect(conn)
+    metadata = sa.MetaData()
+    for name, table_name, columns, unique in INDEXES:
+        if name not in {index['name'] for index in inspector.get_indexes(table_name)}:
+            table = sa.Table(table_name, metadata, autoload_with=conn)
+            sa.Index(name, *(table.c[column] for column in columns), unique=unique).create(conn)
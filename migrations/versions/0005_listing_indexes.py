@@ -0,0 +1,18 @@
+import sqlalchemy as sa
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_student_profile_last_name', 'student_profile', ['last_name', 'id']),
+    ('ix_subject_name', 'subject', ['name', 'id']),
+    ('ix_student_subject_subject_id', 'student_subject', ['subject_id']),
+]
+
+
+def upgrade(conn):
+    """Index the sort keys of the paginated listings and the per-subject enrollment count"""
+    inspector = sa.inspect(conn)
+    metadata = sa.MetaData()
+    for name, table_name, columns in INDEXES:
+        if name not in {index['name'] for index in inspector.get_indexes(table_name)}:
+            table = sa.Table(table_name, metadata, autoload_with=conn)
+            sa.Index(name, *(table.c[column] for column in columns)).create(conn)
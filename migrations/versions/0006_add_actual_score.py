@@ -0,0 +1,9 @@
+import sqlalchemy as sa
+
+
+def upgrade(conn):
+    """Add the observed final score, used as the training label, to student_performance"""
+    columns = [col['name'] for col in sa.inspect(conn).get_columns('student_performance')]
+    
+    if 'actual_score' not in columns:
+        conn.execute(sa.text('ALTER TABLE student_performance ADD COLUMN actual_score FLOAT'))
@@ -0,0 +1,36 @@
+import argparse
+import sys
+from app.models.artifact_store import ArtifactError, ArtifactStore
+
+parser = argparse.ArgumentParser(description='List published model versions or roll back to an earlier one.')
+subparsers = parser.add_subparsers(dest='command', required=True)
+subparsers.add_parser('list', help='show published versions, newest first (* marks the one being served)')
+rollback = subparsers.add_parser('rollback', help='serve an earlier version again')
+rollback.add_argument('version', nargs='?', help='version to restore (default: the one the current version replaced)')
+args = parser.parse_args()
+
+store = ArtifactStore()
+
+if args.command == 'list':
+    current = store.current_version()
+    versions = store.versions()
+    if not versions:
+        print("No model versions have been published yet.")
+    for version in reversed(versions):
+        marker = '*' if version == current else ' '
+        try:
+            manifest = store.read_manifest(version)
+        except ArtifactError as e:
+            print(f"{marker} {version}  ⚠️ {e}")
+            continue
+        metrics = manifest.get('metrics') or {}
+        r2 = f"{metrics['r2']:.3f}" if 'r2' in metrics else '-'
+        print(f"{marker} {version}  {manifest['estimator']:<26} r2 {r2:<6} created {manifest['created_at']}")
+
+else:
+    try:
+        version = store.rollback(args.version)
+    except ArtifactError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Now serving model version {version}; running workers switch to it on their next prediction.")
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+# Modules a worker should not need to import to serve login and health checks
+HEAVY_MODULES = ['sklearn', 'matplotlib', 'pandas', 'scipy', 'joblib']
+
+# Runs in a fresh interpreter: import the production app, serve the routes, report what got loaded
+PROBE = """
+import json, sys
+import railway_app
+client = railway_app.app.test_client()
+statuses = {path: client.get(path).status_code for path in sys.argv[1:]}
+print(json.dumps({'statuses': statuses, 'modules': sorted(sys.modules)}))
+"""
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)$')
+
+parser = argparse.ArgumentParser(description='Report import time per package for a cold app start.')
+parser.add_argument('paths', nargs='*', default=['/login', '/health'], help='routes to serve after startup (default: /login /health)')
+parser.add_argument('--top', type=int, default=25, help='number of packages to list (default: 25)')
+parser.add_argument('--json', dest='json_path', help='also write the report as JSON to this file')
+args = parser.parse_args()
+
+# Start against a throwaway database so profiling never touches real data
+with tempfile.TemporaryDirectory() as tmp:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'profile.db')}", SQL_LOG_REQUESTS='false')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE, *args.paths],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True,
+    )
+if result.returncode != 0:
+    print(result.stderr)
+    sys.exit(result.returncode)
+
+probe = json.loads(result.stdout.strip().splitlines()[-1])
+
+# Self time of every imported module, summed per top-level package so the totals add up
+package_ms = {}
+for line in result.stderr.splitlines():
+    match = IMPORT_TIME_LINE.match(line)
+    if match:
+        package = match.group(2).split('.')[0]
+        package_ms[package] = package_ms.get(package, 0) + int(match.group(1)) / 1000
+imports = sorted(package_ms.items(), key=lambda item: item[1], reverse=True)
+total_ms = sum(package_ms.values())
+
+print(f"Total import time: {total_ms:.1f} ms")
+for package, ms in imports[:args.top]:
+    print(f"  {ms:9.1f} ms  {package}")
+
+for path, status in probe['statuses'].items():
+    print(f"GET {path}: {status}")
+
+loaded_packages = {module.split('.')[0] for module in probe['modules']}
+heavy_loaded = [module for module in HEAVY_MODULES if module in loaded_packages]
+if heavy_loaded:
+    print(f"⚠️ Heavy modules loaded: {', '.join(heavy_loaded)}")
+else:
+    print("✅ No heavy modules loaded")
+
+if args.json_path:
+    with open(args.json_path, 'w') as f:
+        json.dump({
+            'total_ms': round(total_ms, 1),
+            'imports': [{'package': package, 'ms': round(ms, 1)} for package, ms in imports],
+            'statuses': probe['statuses'],
+            'heavy_modules_loaded': heavy_loaded,
+        }, f, indent=2)
+
+sys.exit(1 if heavy_loaded else 0)
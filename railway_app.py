@@ -10,6 +10,8 @@ Railway-specific production app that properly handles Railway's PORT requirement
 import os
 import warnings
 from app import create_app, db
+from app.models.ml_model import model_registry
+from migrations import upgrade
 
 # Suppress scikit-learn warnings
 warnings.filterwarnings('ignore', category=UserWarning)
@@ -17,18 +19,19 @@ warnings.filterwarnings('ignore', category=FutureWarning)
 
 app = create_app()
 
-# Initialize database tables
+# Apply pending schema migrations (a no-op when the schema is up to date)
 with app.app_context():
     try:
-        db.create_all()
-        print("✅ Database tables created successfully")
+        upgrade(db.engine)
+        print("✅ Database schema is up to date")
     except Exception as e:
-        print(f"⚠️ Database initialization error: {e}")
+        print(f"⚠️ Database migration error: {e}")
 
 # Railway health check endpoint
 @app.route('/health')
 def health_check():
-    return {'status': 'healthy', 'service': 'Student Performance Analyzer'}, 200
+    return {'status': 'healthy', 'service': 'Student Performance Analyzer',
+            'model': model_registry.stats()}, 200
 
 # Railway-specific configuration
 if __name__ == '__main__':
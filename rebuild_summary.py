@@ -0,0 +1,10 @@
+from app import create_app
+from app.services.summary import rebuild_summary
+
+app = create_app()
+with app.app_context():
+    print("Rebuilding the faculty dashboard summary from the performance tables...")
+    summary = rebuild_summary()
+    print(f"Subjects: {summary.subject_count}, students: {summary.student_count}, "
+          f"performance records: {summary.performance_count}, students with data: {summary.students_with_data}, "
+          f"average predicted score: {summary.avg_predicted_score:.2f}")
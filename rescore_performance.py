@@ -0,0 +1,29 @@
+import argparse
+import json
+from app import create_app
+from app.services.rescoring import DEFAULT_CHECKPOINT_PATH, DEFAULT_CHUNK_SIZE, rescore_performances
+
+parser = argparse.ArgumentParser(description='Recompute predicted scores for all performance records with the current model.')
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                    help='rows read, scored and updated per chunk (default: %(default)s)')
+parser.add_argument('--dry-run', action='store_true', help='only report how much the scores would change')
+parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_PATH,
+                    help='file recording progress for resuming (default: %(default)s)')
+parser.add_argument('--restart', action='store_true', help='ignore the checkpoint of an interrupted run')
+args = parser.parse_args()
+
+
+def report_progress(rows_done, rows_total):
+    percent = 100.0 * rows_done / rows_total if rows_total else 100.0
+    print(f"  {rows_done}/{rows_total} rows ({percent:.1f}%)")
+
+
+app = create_app()
+with app.app_context():
+    result = rescore_performances(chunk_size=args.chunk_size, dry_run=args.dry_run,
+                                  checkpoint_path=args.checkpoint, resume=not args.restart,
+                                  progress=report_progress)
+
+if result.resumed_from:
+    print(f"Resumed after performance id {result.resumed_from}")
+print(json.dumps(result.to_dict(), indent=2))
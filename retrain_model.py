@@ -1,8 +1,78 @@
+import argparse
+import json
+import sys
 from app import create_app
-from app.models.ml_model import initialize_model
+from app.models.ml_model import generate_synthetic_data, initialize_model
+from app.services.model_search import DEFAULT_BUDGET_SECONDS, DEFAULT_MAX_LATENCY_MS, DEFAULT_MIN_R2, search_model
+from app.services.training import (DEFAULT_CHUNK_SIZE, DEFAULT_SYNTHETIC_ROWS, LABELS, build_training_set,
+                                   train_from_database)
+
+parser = argparse.ArgumentParser(description='Train the prediction model.')
+parser.add_argument('--from-database', action='store_true',
+                    help='train on the labelled performance records instead of synthetic data only')
+parser.add_argument('--label', choices=LABELS, default='actual_score',
+                    help='column to predict (default: %(default)s)')
+parser.add_argument('--synthetic-rows', type=int, default=DEFAULT_SYNTHETIC_ROWS,
+                    help='synthetic rows mixed into the database rows (default: %(default)s)')
+parser.add_argument('--synthetic-weight', type=float, default=1.0,
+                    help='sample weight of each synthetic row relative to a real one (default: %(default)s)')
+parser.add_argument('--grow', type=int, default=0, metavar='TREES',
+                    help='add this many trees to the existing forest instead of refitting it')
+parser.add_argument('--after-id', type=int, default=0,
+                    help='only read performance records with a larger id, e.g. the last id of a previous run')
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                    help='rows read from the database per query (default: %(default)s)')
+parser.add_argument('--search', action='store_true',
+                    help='cross-validate a grid of model families and sizes on all cores and keep the best one')
+parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_SECONDS,
+                    help='wall-clock seconds the search may take (default: %(default)s)')
+parser.add_argument('--min-r2', type=float, default=DEFAULT_MIN_R2,
+                    help='cross-validated R² the chosen model must reach (default: %(default)s)')
+parser.add_argument('--max-latency-ms', type=float, default=DEFAULT_MAX_LATENCY_MS,
+                    help='median milliseconds the chosen model may take per row (default: %(default)s)')
+parser.add_argument('--workers', type=int, help='search processes (default: the CPU count)')
+args = parser.parse_args()
+if args.search and args.grow:
+    parser.error('--grow adds trees to the current model and cannot be combined with --search')
 
 app = create_app()
 with app.app_context():
-    print("Retraining the ML model with improved prediction algorithm...")
-    model = initialize_model()
-    print("Model training complete!")
+    if args.search:
+        if args.from_database:
+            training_set = build_training_set(args.label, args.synthetic_rows, args.synthetic_weight,
+                                              args.chunk_size, args.after_id)
+            X, y, sample_weight = training_set.X, training_set.y, training_set.sample_weight
+        else:
+            X, y = generate_synthetic_data(args.synthetic_rows, as_frame=False)
+            sample_weight = None
+        print(f"Searching for the best model on {len(y)} rows (budget {args.budget:g}s)...")
+        report = search_model(X, y, sample_weight, budget_seconds=args.budget, min_r2=args.min_r2,
+                              max_latency_ms=args.max_latency_ms, workers=args.workers)
+        for candidate in report['candidates']:
+            if candidate['status'] == 'ok':
+                mark = '✅' if candidate['meets_targets'] else '  '
+                print(f"  {mark} {candidate['family']:<18} {json.dumps(candidate['params']):<40} "
+                      f"R² {candidate['cv_r2_mean']:.3f}  {candidate['latency_ms']:.3f} ms/row")
+            else:
+                print(f"     {candidate['family']:<18} {json.dumps(candidate['params']):<40} {candidate['status']}")
+        if report['chosen'] is None:
+            print("❌ No candidate met the accuracy and latency targets; the current model was kept.")
+            sys.exit(1)
+        print(f"Model training complete! Chose {report['chosen']['family']} {report['chosen']['params']}, "
+              f"holdout metrics: {report['holdout']}")
+    elif not args.from_database:
+        print("Retraining the ML model with improved prediction algorithm...")
+        model = initialize_model()
+        print("Model training complete!")
+    else:
+        print(f"Training the ML model on recorded {args.label} values...")
+        try:
+            result = train_from_database(label=args.label, synthetic_rows=args.synthetic_rows,
+                                         synthetic_weight=args.synthetic_weight, grow_trees=args.grow,
+                                         chunk_size=args.chunk_size, after_id=args.after_id)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        print(f"Model training complete! Pass --after-id {result['last_id']} next time to grow on newer records only.")
+    print("Run 'python rescore_performance.py' to update stored predicted scores.")
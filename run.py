@@ -1,11 +1,16 @@
-from app import create_app
-from app.models.ml_model import initialize_model
+from app import create_app, db
+from app.models.ml_model import get_predictor
+from migrations import upgrade
 
 app = create_app()
 
-# Initialize the ML model with synthetic data when the app starts
+# Create or upgrade the database schema
 with app.app_context():
-    initialize_model()
+    upgrade(db.engine)
+
+# Load (or train with synthetic data) the shared ML model when the app starts
+with app.app_context():
+    get_predictor()
 
 if __name__ == '__main__':
     app.run(debug=True)
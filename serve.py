@@ -0,0 +1,86 @@
+"""
+Production server: gunicorn with the app and the trained model preloaded
+
+The master process imports the app (running pending migrations once), loads the
+shared predictor and freezes the heap before forking, so every worker starts with
+the model already in memory and shares its pages copy-on-write instead of loading
+or training its own copy.
+
+Send SIGHUP to the master for a zero-downtime reload: it reloads the model from
+the artifacts on disk, then gunicorn starts fresh workers and gracefully stops the
+old ones once they finish their in-flight requests.
+"""
+import argparse
+import gc
+import os
+from gunicorn.app.base import BaseApplication
+from app import db
+from app.models.ml_model import get_predictor, model_registry
+
+
+def preload_model(app):
+    """Load (or train, if no artifacts exist yet) the predictor in the current process"""
+    with app.app_context():
+        get_predictor()
+    # Move everything loaded so far out of the collector's reach, so collections in
+    # the workers don't write to (and un-share) the pages inherited from the master
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared across processes
+    with server.app.wsgi_app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def on_reload(arbiter):
+    print("🔄 Reloading the model before replacing workers")
+    gc.unfreeze()
+    model_registry.invalidate()
+    preload_model(arbiter.app.wsgi_app)
+
+
+class ProductionServer(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        self.wsgi_app = None
+        super().__init__()
+    
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+    
+    def load(self):
+        # With preload_app this runs once, in the master, before any worker forks
+        if self.wsgi_app is None:
+            from railway_app import app
+            preload_model(app)
+            self.wsgi_app = app
+        return self.wsgi_app
+
+
+parser = argparse.ArgumentParser(description='Serve the app with gunicorn, sharing the preloaded model across workers.')
+parser.add_argument('--bind', default=f"0.0.0.0:{os.environ.get('PORT', 5000)}",
+                    help='address to listen on (default: 0.0.0.0:$PORT)')
+parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)),
+                    help='worker processes (default: $WEB_CONCURRENCY or the CPU count)')
+parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 2)),
+                    help='threads per worker (default: $WEB_THREADS or 2)')
+parser.add_argument('--timeout', type=int, default=int(os.environ.get('WEB_TIMEOUT', 30)),
+                    help='seconds before a silent worker is restarted (default: $WEB_TIMEOUT or 30)')
+args = parser.parse_args()
+
+print(f"🚀 Starting {args.workers} workers x {args.threads} threads on {args.bind}")
+ProductionServer({
+    'bind': args.bind,
+    'workers': args.workers,
+    'threads': args.threads,
+    'worker_class': 'gthread' if args.threads > 1 else 'sync',
+    'timeout': args.timeout,
+    'graceful_timeout': args.timeout,
+    'preload_app': True,
+    'post_fork': post_fork,
+    'on_reload': on_reload,
+}).run()
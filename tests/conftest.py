@@ -0,0 +1,56 @@
+import os
+import sys
+
+# Add the project root to sys.path, so the tests also run with a bare ``pytest``
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from app import create_app, db
+from app.models.artifact_store import ArtifactStore
+from app.models.ml_model import model_registry
+from benchmarks.runner import QueryCounter
+from migrations import upgrade
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App on a fresh, migrated SQLite database and model store in a temporary directory"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('SQL_LOG_REQUESTS', 'false')
+    # The next prediction loads (and publishes) the model here instead of app/models/artifacts
+    monkeypatch.setattr(model_registry, 'store', ArtifactStore(str(tmp_path / 'artifacts')))
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        upgrade(db.engine)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def login(app):
+    """Factory for test clients logged in as a user id, through the session"""
+    def login(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        return client
+    return login
+
+
+@pytest.fixture
+def count_queries(app):
+    """``count_queries(client, url)``: status code and number of statements of one GET"""
+    with app.app_context():
+        engine = db.engine
+    
+    def count_queries(client, url):
+        counter = QueryCounter(engine)
+        try:
+            response = client.get(url)
+        finally:
+            counter.close()
+        return response.status_code, counter.count
+    return count_queries
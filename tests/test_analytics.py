@@ -0,0 +1,20 @@
+import numpy as np
+from app import db
+from app.models.user import StudentPerformance
+from app.services.analytics import performance_analytics
+from benchmarks.seed import seed_database
+
+
+def test_histogram_matches_numpy(app):
+    with app.app_context():
+        seed_database(students=40, subjects=3, per_student=3, faculty=1)
+        # Scores near the top of a bucket must not be counted in the next one
+        db.session.query(StudentPerformance).filter(StudentPerformance.id % 4 == 0).update(
+            {StudentPerformance.predicted_score: 19.9}, synchronize_session=False)
+        db.session.commit()
+        scores = [score for (score,) in db.session.query(StudentPerformance.predicted_score)]
+        
+        counts, edges = performance_analytics(bins=10)['histogram']
+        expected_counts, expected_edges = np.histogram(scores, bins=10)
+        assert counts == expected_counts.tolist()
+        assert np.allclose(edges, expected_edges)
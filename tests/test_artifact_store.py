@@ -0,0 +1,97 @@
+import os
+import pytest
+from app.models.artifact_store import CURRENT_FILE, ArtifactError, ArtifactStore
+from app.models.ml_model import ModelRegistry, StudentPerformancePredictor, generate_synthetic_data
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'artifacts'))
+
+
+def _publish(store, text):
+    def write_files(directory):
+        with open(os.path.join(directory, 'model.txt'), 'w') as f:
+            f.write(text)
+        return {'model': 'model.txt'}
+    return store.publish(write_files, {'metrics': {'text': text}})
+
+
+def test_publish_makes_a_verified_version_current(store):
+    first = _publish(store, 'first')
+    second = _publish(store, 'second')
+    
+    assert store.current_version() == second
+    assert sorted(store.versions()) == sorted([first, second])
+    manifest = store.verify(second)
+    assert manifest['parent'] == first
+    assert manifest['metrics'] == {'text': 'second'}
+    assert manifest['files']['model']['bytes'] == len('second')
+    assert not [name for name in os.listdir(store.root) if name.startswith('.tmp-')]
+
+
+def test_failed_publish_leaves_the_current_version(store):
+    first = _publish(store, 'first')
+    
+    def write_files(directory):
+        raise OSError('disk full')
+    with pytest.raises(OSError):
+        store.publish(write_files, {})
+    
+    assert store.current_version() == first
+    assert store.versions() == [first]
+    assert sorted(os.listdir(store.root)) == sorted([CURRENT_FILE, first])
+
+
+def test_corrupted_version_fails_verification(store):
+    first = _publish(store, 'first')
+    second = _publish(store, 'second')
+    with open(os.path.join(store.version_dir(first), 'model.txt'), 'w') as f:
+        f.write('tampered')
+    
+    with pytest.raises(ArtifactError, match='corrupted model file'):
+        store.verify(first)
+    with pytest.raises(ArtifactError):
+        store.rollback()
+    assert store.current_version() == second
+
+
+def test_rollback_to_the_parent_or_a_named_version(store):
+    first = _publish(store, 'first')
+    second = _publish(store, 'second')
+    third = _publish(store, 'third')
+    
+    assert store.rollback() == second
+    assert store.current_version() == second
+    assert store.rollback(third) == third
+    assert store.rollback(first) == first
+    with pytest.raises(ArtifactError, match='No version older'):
+        store.rollback()
+
+
+def test_registry_swaps_in_the_current_version(store):
+    X, y = generate_synthetic_data(200, as_frame=False)
+    first = StudentPerformancePredictor(store=store)
+    first.train(X, y)
+    second = StudentPerformancePredictor(store=store)
+    second.train(X[:100], y[:100])
+    
+    registry = ModelRegistry(store=store)
+    served = registry.get()
+    assert served.version == second.version
+    assert registry.get() is served
+    
+    store.rollback()
+    rolled_back = registry.get()
+    assert rolled_back is not served
+    assert rolled_back.version == first.version
+    assert rolled_back.predict(X[0]) == pytest.approx(first.predict(X[0]))
+    
+    # A version that fails to load is reported; the model in memory keeps serving
+    with open(os.path.join(store.version_dir(second.version), 'forest.npz'), 'ab') as f:
+        f.write(b'corrupt')
+    with open(store.current_path, 'w') as f:
+        f.write(second.version + '\n')
+    assert registry.get() is rolled_back
+    assert registry.stats()['load_errors'] == 1
+    assert 'corrupted forest file' in registry.stats()['last_error']
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from app.models.ml_model import (COMPACT_GROUPED_MIN_ROWS, COMPACT_MAX_BATCH_ROWS, StudentPerformancePredictor,
+                                 export_compact_model, generate_synthetic_data, load_compact_model)
+
+
+@pytest.fixture(scope='module')
+def forest():
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+    X, y = generate_synthetic_data(500, as_frame=False)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestRegressor(n_estimators=20, random_state=42).fit(scaler.transform(X), y)
+    return model, scaler
+
+
+@pytest.fixture
+def predictor(tmp_path):
+    paths = {name: str(tmp_path / filename) for name, filename in
+             (('model_path', 'model.pkl'), ('scaler_path', 'scaler.pkl'), ('forest_path', 'forest.npz'))}
+    X, y = generate_synthetic_data(300, as_frame=False)
+    StudentPerformancePredictor(**paths).train(X, y)
+    return StudentPerformancePredictor(**paths)
+
+
+def test_exported_arrays_are_aligned_and_readable(forest, tmp_path):
+    path = str(tmp_path / 'forest.npz')
+    export_compact_model(*forest, path)
+    
+    _, compact = load_compact_model(path)
+    assert all(getattr(compact, name).flags.aligned for name in ('feature', 'threshold', 'children', 'value'))
+    with np.load(path) as arrays:
+        assert np.array_equal(arrays['threshold'], compact.threshold)
+
+
+@pytest.mark.parametrize('rows', [1, COMPACT_GROUPED_MIN_ROWS - 1, COMPACT_GROUPED_MIN_ROWS, 3000])
+def test_compact_predictions_match_the_forest(forest, tmp_path, rows):
+    model, scaler = forest
+    path = str(tmp_path / 'forest.npz')
+    export_compact_model(model, scaler, path)
+    compact_scaler, compact = load_compact_model(path)
+    
+    X, _ = generate_synthetic_data(rows, random_state=1, as_frame=False)
+    expected = model.predict(scaler.transform(X))
+    assert np.allclose(compact.predict(compact_scaler.transform(X)), expected, rtol=0, atol=1e-9)
+
+
+def test_large_batches_are_scored_by_the_pickled_forest(predictor):
+    X, _ = generate_synthetic_data(COMPACT_MAX_BATCH_ROWS, random_state=1, as_frame=False)
+    compact_scores = predictor.model.predict(predictor.scaler.transform(X))
+    
+    predictor.predict_batch(X[:COMPACT_MAX_BATCH_ROWS - 1])
+    assert predictor._large_batch_model is None
+    
+    scores = predictor.predict_batch(X)
+    assert type(predictor._large_batch_model[2]).__name__ == 'RandomForestRegressor'
+    assert np.allclose(scores, compact_scores, rtol=0, atol=1e-9)
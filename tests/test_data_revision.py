@@ -0,0 +1,25 @@
+import sqlalchemy as sa
+from app import db
+from app.models.user import DataRevision
+
+
+def test_bump_creates_and_increments_scopes(app):
+    with app.app_context():
+        DataRevision.bump('performance', 'student:1', 'student:1')
+        db.session.commit()
+        DataRevision.bump('performance', 'student:2')
+        db.session.commit()
+        
+        assert DataRevision.current('performance', 'student:1', 'student:2', 'predictions') == (2, 1, 1, 0)
+
+
+def test_first_bump_counts_a_row_inserted_by_a_concurrent_transaction(app):
+    with app.app_context():
+        # Another request bumps the new scope first and commits
+        with db.engine.begin() as conn:
+            conn.execute(sa.insert(DataRevision.__table__).values(scope='student:7', revision=1))
+        
+        DataRevision.bump('student:7')
+        db.session.commit()
+        assert DataRevision.current('student:7') == (2,)
+
@@ -0,0 +1,64 @@
+import base64
+import json
+import pytest
+from flask import url_for
+from app.models.user import Subject
+from app.services.pagination import MAX_CHAR, decode_cursor, encode_cursor, prefix_filter
+from benchmarks.seed import seed_database
+
+
+def _raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.mark.parametrize('values', [
+    {'name': 'x'},
+    [{'name': 'x'}, 1],
+    [['x'], 1],
+    [None, 1],
+    [True, 1],
+    ['x'],
+    ['x', 1, 2],
+])
+def test_tampered_cursor_is_ignored(values):
+    assert decode_cursor(_raw_cursor(values), 2) is None
+
+
+def test_valid_cursor_round_trips():
+    assert decode_cursor(encode_cursor(['Smith', 12]), 2) == ['Smith', 12]
+    assert decode_cursor(encode_cursor([81.5, 3]), 2) == [81.5, 3]
+
+
+@pytest.mark.parametrize('prefix, upper', [
+    ('ab', 'ac'),
+    ('a' + MAX_CHAR, 'b'),
+    ('a' + MAX_CHAR * 2, 'b'),
+    ('a\ud7ff', 'a\ue000'),
+])
+def test_prefix_filter_upper_bound(prefix, upper):
+    condition = prefix_filter(Subject.name, prefix)
+    assert condition.clauses[1].right.value == upper
+
+
+def test_prefix_of_only_the_highest_character_has_no_upper_bound():
+    condition = prefix_filter(Subject.name, MAX_CHAR)
+    assert condition.right.value == MAX_CHAR
+
+
+def test_listings_serve_the_first_page_for_a_tampered_cursor(app, login):
+    with app.app_context():
+        fixture = seed_database(students=3, subjects=3, per_student=1, faculty=1)
+    listings = [
+        (login(fixture['faculty_user_id']), 'faculty.students', b'Student0000003'),
+        (login(fixture['student_user_id']), 'student.subjects', b'Subject 0003'),
+    ]
+    
+    for client, endpoint, last_item in listings:
+        with app.test_request_context():
+            url = url_for(endpoint)
+        for values in ([{'a': 1}, 1], [[1], [2]], ['x'], 'x'):
+            response = client.get(url, query_string={'after': _raw_cursor(values)})
+            assert response.status_code == 200
+            assert last_item in response.data
+        assert client.get(url, query_string={'q': MAX_CHAR}).status_code == 200
+
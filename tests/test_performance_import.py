@@ -0,0 +1,74 @@
+import io
+import pytest
+from flask import url_for
+from app.models.ml_model import StudentPerformancePredictor
+from app.models.user import StudentPerformance
+from app.services.performance_import import import_performance_csv, open_text_stream
+from benchmarks.seed import seed_database
+
+HEADER = b'roll_number,subject_code,previous_grade,current_grade,attendance,study_hours\n'
+
+
+@pytest.fixture
+def fixture(app):
+    with app.app_context():
+        return seed_database(students=5, subjects=1, per_student=0, faculty=1)
+
+
+@pytest.fixture
+def predictor(tmp_path):
+    """Predictor without a model, scoring with the heuristic and never touching the artifact store"""
+    return StudentPerformancePredictor(model_path=str(tmp_path / 'model.pkl'), scaler_path=str(tmp_path / 'scaler.pkl'),
+                                       forest_path=str(tmp_path / 'forest.npz'))
+
+
+def _import(data, predictor, **kwargs):
+    return import_performance_csv(open_text_stream(io.BytesIO(data)), filename='upload.csv',
+                                  predictor=predictor, **kwargs)
+
+
+def test_latin1_upload_is_reported_not_a_server_error(app, fixture, login):
+    client = login(fixture['faculty_user_id'])
+    with app.test_request_context():
+        url = url_for('faculty.import_performance')
+    
+    data = HEADER + 'R0000001,S0001,70,75,90,8,Müller\n'.encode('latin-1')
+    response = client.post(url, data={'file': (io.BytesIO(data), 'upload.csv')})
+    
+    assert response.status_code == 200
+    assert b'not UTF-8 encoded text' in response.data
+
+
+def test_rows_before_undecodable_bytes_are_imported(app, fixture, predictor):
+    # Far enough into the file that the text stream decodes the valid rows first
+    rows = b'R0000001,S0001,70,75,90,8\n' * 2000
+    with app.app_context():
+        report = _import(HEADER + rows + b'R0000001,S0001,70,75,90,\xff\n', predictor)
+        
+        assert report.error_count == 1
+        assert 'not UTF-8 encoded text' in report.errors[0][1]
+        assert report.imported == 1
+        assert StudentPerformance.query.count() == 1
+
+
+def test_malformed_csv_is_reported(app, fixture, predictor):
+    oversized_field = b'"' + b'x' * 200_000 + b'"'
+    with app.app_context():
+        report = _import(HEADER + b'R0000001,S0001,70,75,90,8\n' + oversized_field + b'\n', predictor)
+    
+    assert report.error_count == 1
+    assert report.errors[0][0] == 3
+    assert report.errors[0][1].startswith('The file is not valid CSV')
+    assert report.imported == 1
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf'])
+def test_non_finite_row_is_rejected_without_failing_its_chunk(app, fixture, predictor, value):
+    rows = [f'R000000{i},S0001,70,75,90,8\n' for i in range(1, 6)]
+    rows[2] = f'R0000003,S0001,70,{value},90,8\n'
+    with app.app_context():
+        report = _import(HEADER + ''.join(rows).encode(), predictor, batch_size=100)
+        
+        assert report.errors == [(4, 'Grades, attendance and study hours must be finite numbers.')]
+        assert report.imported == 4
+        assert StudentPerformance.query.count() == 4
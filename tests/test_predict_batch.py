@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from app.models.ml_model import LEGACY_FEATURE_INDEX, StudentPerformancePredictor, generate_synthetic_data
+
+
+def _predictor(tmp_path, n_features=None):
+    """Predictor on scratch paths, trained on ``n_features`` columns (the heuristic when None)"""
+    predictor = StudentPerformancePredictor(model_path=str(tmp_path / 'model.pkl'),
+                                            scaler_path=str(tmp_path / 'scaler.pkl'),
+                                            forest_path=str(tmp_path / 'forest.npz'))
+    if n_features is not None:
+        X, y = generate_synthetic_data(200, as_frame=False)
+        predictor.train(X if n_features == 4 else X[:, LEGACY_FEATURE_INDEX], y)
+    return predictor
+
+
+@pytest.fixture
+def rows():
+    X, _ = generate_synthetic_data(40, random_state=7, as_frame=False)
+    return X
+
+
+# (features the model was trained on, columns passed in); a model without
+# current_grade also accepts the 4-column layout
+@pytest.mark.parametrize('n_features, columns', [(None, 3), (None, 4), (3, 3), (3, 4), (4, 4)])
+def test_batch_matches_single_row_predictions(tmp_path, rows, n_features, columns):
+    predictor = _predictor(tmp_path, n_features)
+    X = rows if columns == 4 else rows[:, LEGACY_FEATURE_INDEX]
+    
+    scores = predictor.predict_batch(X)
+    
+    assert scores.shape == (len(X),)
+    assert np.allclose(scores, [predictor.predict(row) for row in X], rtol=0, atol=1e-9)
+
+
+def test_single_rows_and_lists_are_accepted(tmp_path, rows):
+    predictor = _predictor(tmp_path, 4)
+    assert predictor.predict_batch(rows[0]).shape == (1,)
+    assert np.allclose(predictor.predict_batch(rows[:5].tolist()), predictor.predict_batch(rows[:5]))
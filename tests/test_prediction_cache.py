@@ -0,0 +1,43 @@
+from app.models.artifact_store import ArtifactStore
+from app.models.ml_model import ModelRegistry, StudentPerformancePredictor
+
+ROW = [70.004, 75, 90, 8]
+
+
+def _registry(tmp_path, monkeypatch, cache_size):
+    monkeypatch.setenv('PREDICTION_CACHE_SIZE', str(cache_size))
+    versions = iter(['v1', 'v2'])
+    
+    def loader():
+        # Heuristic scoring, labelled with the version it stands for
+        predictor = StudentPerformancePredictor(model_path=str(tmp_path / 'model.pkl'),
+                                                scaler_path=str(tmp_path / 'scaler.pkl'),
+                                                forest_path=str(tmp_path / 'forest.npz'))
+        predictor.version = next(versions)
+        return predictor
+    return ModelRegistry(loader=loader, store=ArtifactStore(str(tmp_path / 'artifacts')))
+
+
+def test_cache_is_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv('PREDICTION_CACHE_SIZE', raising=False)
+    registry = ModelRegistry(loader=lambda: None, store=ArtifactStore(str(tmp_path)))
+    assert registry.cache is None
+
+
+def test_cache_is_emptied_when_the_artifacts_change(tmp_path, monkeypatch):
+    registry = _registry(tmp_path, monkeypatch, cache_size=16)
+    first = registry.get()
+    score = first.predict(ROW)
+    assert first.predict([70.001, 75, 90, 8]) == score
+    assert registry.cache.stats() == {'size': 1, 'max_size': 16, 'hits': 1, 'misses': 1}
+    
+    # A publish or rollback replaces CURRENT, which changes the registry's signature
+    (tmp_path / 'artifacts').mkdir()
+    (tmp_path / 'artifacts' / 'CURRENT').write_text('v2\n')
+    second = registry.get()
+    assert second is not first and second.version == 'v2'
+    assert second.cache is registry.cache
+    assert registry.cache.stats()['size'] == 0
+    
+    second.predict(ROW)
+    assert registry.cache.stats() == {'size': 1, 'max_size': 16, 'hits': 1, 'misses': 2}
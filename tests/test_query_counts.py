@@ -0,0 +1,67 @@
+"""Pages must run a fixed number of queries, however much data they show"""
+from flask import url_for
+from app import db
+from app.models.user import User, StudentProfile, Subject, StudentSubject, StudentPerformance
+from benchmarks.seed import seed_database
+
+
+def _add_students(count, subject_id):
+    """Add ``count`` students after the seeded ones, each enrolled with performance data in one subject"""
+    first_user_id = db.session.query(db.func.max(User.id)).scalar() + 1
+    first_student_id = db.session.query(db.func.max(StudentProfile.id)).scalar() + 1
+    for i in range(count):
+        user_id, student_id = first_user_id + i, first_student_id + i
+        db.session.add(User(id=user_id, email=f'extra{i}@test.local', username=f'extra{i}', role='student'))
+        db.session.add(StudentProfile(id=student_id, user_id=user_id, first_name='Extra',
+                                      last_name=f'Extra{i:04d}', roll_number=f'X{i:04d}'))
+        db.session.add(StudentSubject(student_id=student_id, subject_id=subject_id))
+        db.session.add(StudentPerformance(student_id=student_id, subject_id=subject_id, previous_grade=70,
+                                          current_grade=75, attendance_percentage=90, study_hours=8,
+                                          predicted_score=76))
+    db.session.commit()
+
+
+def _add_subjects(student_id, count):
+    """Enroll a student in ``count`` new subjects, with performance data in each"""
+    first_subject_id = db.session.query(db.func.max(Subject.id)).scalar() + 1
+    for subject_id in range(first_subject_id, first_subject_id + count):
+        db.session.add(Subject(id=subject_id, name=f'Extra {subject_id}', code=f'X{subject_id:04d}'))
+        db.session.add(StudentSubject(student_id=student_id, subject_id=subject_id))
+        db.session.add(StudentPerformance(student_id=student_id, subject_id=subject_id, previous_grade=70,
+                                          current_grade=75, attendance_percentage=90, study_hours=8,
+                                          predicted_score=76))
+    db.session.commit()
+
+
+def test_student_listing_query_count_is_independent_of_student_count(app, login, count_queries):
+    with app.app_context():
+        fixture = seed_database(students=1, subjects=2, per_student=1, faculty=1)
+    client = login(fixture['faculty_user_id'])
+    with app.test_request_context():
+        url = url_for('faculty.students')
+    
+    status, one_student = count_queries(client, url)
+    assert status == 200
+    
+    with app.app_context():
+        # More students than fit on one page
+        _add_students(60, fixture['subject_id'])
+    status, many_students = count_queries(client, url)
+    assert status == 200
+    assert many_students == one_student
+
+
+def test_student_pages_query_count_is_independent_of_subject_count(app, login, count_queries):
+    with app.app_context():
+        fixture = seed_database(students=1, subjects=1, per_student=1, faculty=1)
+    client = login(fixture['student_user_id'])
+    with app.test_request_context():
+        urls = [url_for('student.dashboard'), url_for('student.performance'), url_for('student.add_performance')]
+    
+    one_subject = [count_queries(client, url) for url in urls]
+    with app.app_context():
+        _add_subjects(fixture['student_id'], 20)
+    many_subjects = [count_queries(client, url) for url in urls]
+    
+    assert [status for status, _ in one_subject] == [200] * len(urls)
+    assert many_subjects == one_subject
@@ -0,0 +1,43 @@
+import json
+import os
+import pytest
+from app import db
+from app.models.artifact_store import ARTIFACTS_DIR
+from app.models.user import StudentPerformance
+from app.services.rescoring import DEFAULT_CHECKPOINT_PATH, rescore_performances
+from benchmarks.seed import seed_database
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _interrupt_after_first_chunk(rows_done, rows_total):
+    raise Interrupted()
+
+
+@pytest.mark.skipif('RESCORE_CHECKPOINT' in os.environ, reason='checkpoint path overridden')
+def test_checkpoint_is_kept_beside_the_model_artifacts():
+    assert os.path.dirname(DEFAULT_CHECKPOINT_PATH) == ARTIFACTS_DIR
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(app, tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint' / 'rescore.json')
+    with app.app_context():
+        seed_database(students=5, subjects=2, per_student=2, faculty=0)
+        db.session.query(StudentPerformance).update({StudentPerformance.predicted_score: None})
+        db.session.commit()
+        ids = [id for (id,) in db.session.query(StudentPerformance.id).order_by(StudentPerformance.id)]
+        
+        with pytest.raises(Interrupted):
+            rescore_performances(chunk_size=4, checkpoint_path=checkpoint_path, progress=_interrupt_after_first_chunk)
+        with open(checkpoint_path) as f:
+            assert json.load(f)['last_id'] == ids[3]
+        
+        result = rescore_performances(chunk_size=4, checkpoint_path=checkpoint_path)
+        assert (result.resumed_from, result.rows, result.changed) == (ids[3], 6, 6)
+        assert not os.path.exists(checkpoint_path)
+        assert db.session.query(StudentPerformance).filter(StudentPerformance.predicted_score.is_(None)).count() == 0
+        
+        # A finished run leaves nothing to resume
+        assert rescore_performances(chunk_size=4, checkpoint_path=checkpoint_path).resumed_from == 0
@@ -0,0 +1,30 @@
+from flask import url_for
+from app import db
+from app.models.user import DashboardSummary
+from app.services.summary import SUMMARY_ID, get_dashboard_summary
+from benchmarks.seed import seed_database
+
+
+def test_migrations_create_the_summary_row(app):
+    with app.app_context():
+        summary = db.session.get(DashboardSummary, SUMMARY_ID)
+        assert summary is not None
+        assert (summary.student_count, summary.performance_count) == (0, 0)
+
+
+def test_missing_summary_is_counted_without_writing(app, login):
+    with app.app_context():
+        fixture = seed_database(students=3, subjects=2, per_student=2, faculty=1)
+        DashboardSummary.query.delete()
+        db.session.commit()
+        
+        summary = get_dashboard_summary()
+        assert (summary.student_count, summary.performance_count, summary.students_with_data) == (3, 6, 3)
+        assert summary not in db.session
+    
+    client = login(fixture['faculty_user_id'])
+    with app.test_request_context():
+        url = url_for('faculty.students')
+    assert client.get(url).status_code == 200
+    with app.app_context():
+        assert db.session.get(DashboardSummary, SUMMARY_ID) is None
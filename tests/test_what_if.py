@@ -0,0 +1,71 @@
+import json
+import numpy as np
+import pytest
+from flask import url_for
+from app.services.what_if import what_if_grid
+from benchmarks.seed import seed_database
+
+BASE = {'previous_grade': 70, 'current_grade': 75, 'attendance_percentage': 90, 'study_hours': 8}
+
+
+class RowSumPredictor:
+    """Scores each row with the sum of its features, so every cell can be checked"""
+    
+    def __init__(self):
+        self.batches = []
+    
+    def predict_batch(self, X):
+        self.batches.append(X.shape)
+        return X.sum(axis=1)
+
+
+def test_grid_shape_and_order():
+    predictor = RowSumPredictor()
+    sweeps = {'attendance_percentage': {'start': 50, 'stop': 100, 'step': 25},
+              'study_hours': {'start': 0, 'stop': 10, 'step': 5}}
+    
+    surface = what_if_grid(BASE, sweeps, predictor)
+    
+    assert predictor.batches == [(10, 4)]
+    assert surface['base_score'] == 243
+    assert surface['attendance_percentage'] == [50, 75, 100]
+    assert surface['study_hours'] == [0, 5, 10]
+    assert np.array(surface['scores']).shape == (3, 3)
+    assert surface['scores'][2][1] == 70 + 75 + 100 + 5
+
+
+def test_missing_sweep_keeps_the_base_value():
+    surface = what_if_grid(BASE, {'study_hours': {'start': 1, 'stop': 2, 'step': 0.5}}, RowSumPredictor())
+    assert surface['attendance_percentage'] == [90]
+    assert surface['study_hours'] == [1, 1.5, 2]
+
+
+@pytest.mark.parametrize('sweeps, message', [
+    ({'attendance_percentage': {'start': 0, 'stop': 10}}, 'needs numeric start, stop and step'),
+    ({'attendance_percentage': {'start': 0, 'stop': 10, 'step': 0}}, 'step must be positive'),
+    ({'attendance_percentage': {'start': 10, 'stop': 0, 'step': 1}}, 'start must not exceed stop'),
+    ({'study_hours': {'start': 0, 'stop': 200, 'step': 1}}, 'must stay between 0 and 168'),
+    ({'previous_grade': {'start': 0, 'stop': 10, 'step': 1}}, 'can be swept'),
+    ({'attendance_percentage': {'start': 0, 'stop': 100, 'step': 0.01}}, 'Too many scenarios'),
+    ({'attendance_percentage': {'start': 'nan', 'stop': 10, 'step': 1}}, 'must be finite numbers'),
+    ({'study_hours': {'start': 0, 'stop': 10, 'step': float('inf')}}, 'must be finite numbers'),
+    ({'study_hours': {'start': 0, 'stop': float('nan'), 'step': 1}}, 'must be finite numbers'),
+])
+def test_invalid_sweeps_are_rejected(sweeps, message):
+    with pytest.raises(ValueError, match=message):
+        what_if_grid(BASE, sweeps, RowSumPredictor())
+
+
+def test_non_finite_input_is_a_user_facing_error(app, login):
+    with app.app_context():
+        fixture = seed_database(students=1, subjects=1, per_student=0, faculty=0)
+    client = login(fixture['student_user_id'])
+    with app.test_request_context():
+        url = url_for('api.what_if')
+    
+    # json.dumps writes NaN, which the JSON parser accepts
+    body = json.dumps({'base': BASE, 'sweeps': {'study_hours': {'start': 0, 'stop': float('nan'), 'step': 1}}})
+    response = client.post(url, data=body, content_type='application/json')
+    
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'study_hours start, stop and step must be finite numbers.'}